@@ -1,25 +1,44 @@
-from flask import Flask, jsonify, request, send_from_directory, make_response, redirect
+from flask import (
+    Flask, Response, jsonify, request, send_file, send_from_directory,
+    make_response, redirect, stream_with_context
+)
 from flask_cors import CORS
 import bcrypt
 import os
+import io
+import csv
 import json
+import hashlib
+import mimetypes
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 import logging
-from bson.objectid import ObjectId
 
 from config import (
     ALLOWED_EXTENSIONS, ADMIN_USER, UPLOAD_FOLDER, PARTICIPANTS_FILE,
-    BASE_DIR, CORS_ORIGINS, MAX_CONTENT_LENGTH, init
+    BASE_DIR, CORS_ORIGINS, MAX_CONTENT_LENGTH, MAX_PAGE_SIZE,
+    IMPORT_BATCH_SIZE, WRITE_BEHIND_RETRY_AFTER, IMAGE_VARIANT_WIDTHS,
+    UPLOAD_CHUNK_SIZE, BATCH_UPLOAD_MAX_FILES, BANNER_UPLOAD_WORKERS,
+    CMS_CACHE_MAX_ENTRIES, CMS_CACHE_MAX_BYTES, init
 )
 from cms import ContentManager
-from database import db_manager
+from filecache import file_cache
+from images import submit_variants, variant_name, variants_available
+from database import db_manager, WriteQueueFull, participant_event
+from file_utils import replace_file, write_atomic
 from jwt_utils import generate_tokens, jwt_required, refresh_token
+from logging_config import configure_logging
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging (levels, format and sampling come from LOG_* settings)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# Werkzeug rejects larger request bodies with 413 before they are read
+app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
 
 # Configure CORS more explicitly
 CORS(app, resources={
@@ -34,7 +53,9 @@ CORS(app, resources={
 
 # Initialize CMS
 content_manager = ContentManager(
-    os.path.join(os.path.dirname(__file__), 'content'))
+    os.path.join(os.path.dirname(__file__), 'content'),
+    cache_max_entries=CMS_CACHE_MAX_ENTRIES,
+    cache_max_bytes=CMS_CACHE_MAX_BYTES)
 
 logger.info(f'Upload folder: {UPLOAD_FOLDER}')
 
@@ -76,6 +97,12 @@ def after_request(response):
     return add_cors_headers(response)
 
 
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    limit_mb = MAX_CONTENT_LENGTH // (1024 * 1024)
+    return jsonify({'error': f'File too large. Maximum size is {limit_mb} MB.'}), 413
+
+
 @app.before_request
 def handle_preflight():
     if request.method == "OPTIONS":
@@ -89,6 +116,34 @@ def handle_preflight():
         return response
 
 
+# Caching policies for banner files. GridFS URLs are content-immutable;
+# disk uploads can be replaced under the same name and must revalidate.
+GRIDFS_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+UPLOAD_CACHE_CONTROL = 'public, max-age=3600, must-revalidate'
+# ?w= URLs name a variant that may not be rendered yet, so never pin them
+VARIANT_CACHE_CONTROL = 'no-cache'
+# Public content bundles are revalidated with their ETag after a minute
+BUNDLE_CACHE_CONTROL = 'public, max-age=60, must-revalidate'
+
+# Column order for CSV participant exports
+EXPORT_FIELDS = ['name', 'email', 'message', 'banner', 'event', 'timestamp']
+# Leading characters that make spreadsheets treat a CSV cell as a formula
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+# Leading bytes of the accepted image formats, for sniffing uploads
+IMAGE_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+
+# Extensions written for content-addressed uploads, so that e.g. the same
+# JPEG uploaded as .jpeg and .jpg is stored once
+CANONICAL_EXTENSIONS = {'jpeg': 'jpg'}
+
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -99,17 +154,18 @@ def load_participants():
 
 
 def save_participants(participants):
-    """Save participants to database or file"""
-    # This function is kept for compatibility but uses database manager
+    """Append new participants to database or file"""
+    # This function is kept for compatibility but uses database manager.
+    # Existing records must not be passed in again; they would be duplicated.
     for participant in participants:
-        db_manager.save_participant(participant)
+        db_manager.append_participant(participant)
 
 
 @app.route('/api/health', methods=['GET'])
 def health():
     try:
         # Check if we can read participants file
-        participants = load_participants()
+        participants_count = db_manager.count_participants()
         # Check if uploads directory exists
         uploads_exist = os.path.exists(UPLOAD_FOLDER)
 
@@ -128,7 +184,7 @@ def health():
 
         return jsonify({
             'status': 'healthy',
-            'participants_count': len(participants),
+            'participants_count': participants_count,
             'uploads_directory': uploads_exist,
             'mongodb_connected': mongo_connected,
             'gridfs_available': gridfs_available,
@@ -174,51 +230,309 @@ def upload_banner():
         logger.error('No selected file')
         return jsonify({'error': 'No selected file'}), 400
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
+        try:
+            return jsonify(save_banner(file)), 201
+        except RequestEntityTooLarge:
+            raise
+        except GridFSError as e:
+            logger.error(f'Error saving file to GridFS: {str(e)}')
+            return jsonify({'error': f'Failed to save file to database: {str(e)}'}), 500
+        except Exception as e:
+            logger.error(f'Error saving file: {str(e)}')
+            return jsonify({'error': f'Failed to save file: {str(e)}'}), 500
+
+    logger.error('Invalid file type')
+    return jsonify({'error': f'Invalid file type. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
+
+
+@app.route('/api/banners/batch', methods=['POST'])
+@jwt_required
+def upload_banners():
+    """Upload several banners in one multipart request (field ``files``).
+
+    Each file is validated like a single upload and stored concurrently on
+    the shared upload pool. The response lists one result per file, in
+    request order, with ``url``/``file_id`` or an ``error``.
+    """
+    files = request.files.getlist('files')
+    if not files:
+        logger.error('No file part in request')
+        return jsonify({'error': 'No file part'}), 400
+    if len(files) > BATCH_UPLOAD_MAX_FILES:
+        return jsonify({'error': f'Too many files. Maximum is {BATCH_UPLOAD_MAX_FILES}.'}), 400
+
+    results = [None] * len(files)
+    futures = {}
+    for index, file in enumerate(files):
+        if file.filename == '':
+            results[index] = {'error': 'No selected file'}
+        elif not allowed_file(file.filename):
+            results[index] = {
+                'filename': file.filename,
+                'error': f'Invalid file type. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'}
+        else:
+            futures[index] = upload_executor.submit(save_banner, file)
+    for index, future in futures.items():
+        try:
+            results[index] = future.result()
+        except RequestEntityTooLarge:
+            limit_mb = MAX_CONTENT_LENGTH // (1024 * 1024)
+            results[index] = {'filename': files[index].filename,
+                              'error': f'File too large. Maximum size is {limit_mb} MB.'}
+        except Exception as e:
+            logger.error(f'Error saving file {files[index].filename}: {str(e)}')
+            results[index] = {'filename': files[index].filename,
+                              'error': f'Failed to save file: {str(e)}'}
+
+    stored = sum(1 for result in results if 'error' not in result)
+    status = 201 if stored else 400
+    return jsonify({'results': results, 'stored': stored,
+                    'failed': len(results) - stored}), status
+
+
+# Shared by batch uploads so concurrent requests cannot exceed the bound
+upload_executor = ThreadPoolExecutor(
+    max_workers=BANNER_UPLOAD_WORKERS, thread_name_prefix='banner-upload')
+
+
+class GridFSError(Exception):
+    """Raised by save_banner when storing in GridFS fails."""
+
+
+def save_banner(file):
+    """Ingest one uploaded banner and store it in GridFS or on disk.
+
+    The upload is streamed to a temp file first, so memory use does not
+    depend on its size. Returns the JSON body for the upload response.
+    """
+    filename = secure_filename(file.filename)
+    tmp_path, sha256, sniffed_type = ingest_upload(file.stream)
+    try:
+        content_type = sniffed_type or mimetypes.guess_type(filename)[0] \
+            or file.mimetype
 
         # Prefer GridFS when available
         if db_manager.connected:
             try:
-                file_id = db_manager.store_file(file.read(), filename)
-                logger.info(
-                    f'Stored file {filename} in GridFS with id {file_id}')
-                url = f'/api/files/{file_id}'
-                return jsonify({'url': url, 'file_id': file_id, 'filename': filename}), 201
+                with open(tmp_path, 'rb') as f:
+                    file_id = db_manager.store_file(
+                        f, filename, content_type, sha256)
             except Exception as e:
-                logger.error(f'Error saving file to GridFS: {str(e)}')
-                return jsonify({'error': f'Failed to save file to database: {str(e)}'}), 500
+                raise GridFSError(str(e)) from e
+            logger.info(f'Stored file {filename} in GridFS with id {file_id}')
+            # The variant job removes the temp file once it is done with it
+            if schedule_gridfs_variants(tmp_path, file_id, filename):
+                tmp_path = None
+            return {'url': f'/api/files/{file_id}', 'file_id': file_id,
+                    'filename': filename}
 
         # --- Fallback: save to local disk ---
-        save_path = os.path.join(UPLOAD_FOLDER, filename)
-        logger.info(f'Saving file to: {save_path}')
-        try:
-            file.seek(0)
-            file.save(save_path)
-            url = f'/api/uploads/{filename}'
-            return jsonify({'url': url, 'filename': filename}), 201
-        except Exception as e:
-            logger.error(f'Error saving file: {str(e)}')
-            return jsonify({'error': f'Failed to save file: {str(e)}'}), 500
+        stored_name = store_upload_on_disk(tmp_path, sha256, filename)
+        tmp_path = None
+        schedule_disk_variants(stored_name)
+        return {'url': f'/api/uploads/{stored_name}', 'filename': stored_name}
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def sniff_image_type(head):
+    """Content type from an upload's leading bytes, or None if unknown."""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+def ingest_upload(stream):
+    """Copy an upload stream into a temp file in UPLOAD_FOLDER.
+
+    Reads UPLOAD_CHUNK_SIZE bytes at a time, hashing and sniffing on the
+    way, and aborts with 413 as soon as MAX_CONTENT_LENGTH is exceeded.
+    Returns ``(tmp_path, sha256, sniffed_type)``; the caller owns tmp_path.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    head = b''
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_FOLDER, suffix='.upload')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_CONTENT_LENGTH:
+                    raise RequestEntityTooLarge()
+                if len(head) < 16:
+                    head += chunk[:16]
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), sniff_image_type(head)
+
+
+def store_upload_on_disk(tmp_path, sha256, filename):
+    """Move an ingested upload to its SHA-256 name in UPLOAD_FOLDER.
+
+    Identical content always maps to the same file, so re-uploads return
+    the existing name and the temp file is dropped. Returns the stored name.
+    """
+    extension = filename.rsplit('.', 1)[1].lower()
+    extension = CANONICAL_EXTENSIONS.get(extension, extension)
+    stored_name = f'{sha256}.{extension}'
+    save_path = os.path.join(UPLOAD_FOLDER, stored_name)
+    if os.path.exists(save_path):
+        logger.info(f'File {filename} already stored as {stored_name}')
+        os.remove(tmp_path)
+        return stored_name
+
+    logger.info(f'Saving file to: {save_path}')
+    replace_file(tmp_path, save_path)
+    return stored_name
+
+
+def schedule_gridfs_variants(source_path, file_id, filename):
+    """Generate resized variants of a GridFS banner in the background.
+
+    Returns True if a job was started; it then deletes ``source_path``.
+    Best effort: the upload is already stored, so failures are only logged.
+    """
+    try:
+        if not variants_available() or db_manager.has_variants(file_id):
+            return False
+    except Exception as e:
+        logger.error(f'Error checking variants of {file_id}: {str(e)}')
+        return False
+
+    def store(variants):
+        for width, variant in variants:
+            db_manager.store_variant(
+                file_id, width, variant, variant_name(filename, width))
+
+    def cleanup(_):
+        if os.path.exists(source_path):
+            os.remove(source_path)
+
+    future = submit_variants(source_path, store)
+    if future is None:
+        return False
+    future.add_done_callback(cleanup)
+    return True
 
-    logger.error('Invalid file type')
-    return jsonify({'error': f'Invalid file type. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
+
+def schedule_disk_variants(stored_name):
+    """Generate resized variants of a disk banner in the background.
+
+    Best effort, like schedule_gridfs_variants.
+    """
+    if not variants_available():
+        return
+    if any(os.path.exists(os.path.join(UPLOAD_FOLDER, variant_name(stored_name, w)))
+           for w in IMAGE_VARIANT_WIDTHS):
+        return
+
+    def store(variants):
+        for width, variant in variants:
+            write_atomic(os.path.join(
+                UPLOAD_FOLDER, variant_name(stored_name, width)), variant)
+
+    submit_variants(os.path.join(UPLOAD_FOLDER, stored_name), store)
+
+
+def requested_width():
+    """Width asked for with ?w=, if the client can take WebP variants."""
+    width = request.args.get('w', type=int)
+    if not width or width <= 0 or not request.accept_mimetypes['image/webp']:
+        return None
+    return width
 
 
 @app.route('/api/banners', methods=['GET'])
 def list_banners():
+    """List uploaded banners (variants excluded), oldest first.
+
+    ``banners`` holds the URLs as before and ``files`` their metadata.
+    ``limit``/``after`` page through the list, ``after`` being the id of
+    the last banner on the previous page.
+    """
+    files = None
     # Prefer GridFS when available
     if db_manager.connected:
         try:
-            files = db_manager.fs.find()
-            urls = [f'/api/files/{str(file._id)}' for file in files]
-            return jsonify({'banners': urls}), 200
+            files = [dict(entry, url=f'/api/files/{entry["id"]}')
+                     for entry in db_manager.list_files()]
         except Exception as e:
             logger.error(f'Error listing GridFS files: {str(e)}')
             # fall through to disk fallback
-
-    files = [f for f in os.listdir(UPLOAD_FOLDER) if allowed_file(f)]
-    urls = [f'/api/uploads/{f}' for f in files]
-    return jsonify({'banners': urls}), 200
+    if files is None:
+        files = list_disk_banners()
+
+    after = request.args.get('after') or None
+    limit = request.args.get('limit', type=int)
+    start = 0
+    if after is not None:
+        ids = [entry['id'] for entry in files]
+        if after not in ids:
+            return jsonify({'error': f'Invalid cursor: {after}'}), 400
+        start = ids.index(after) + 1
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        page = files[start:start + limit]
+    else:
+        page = files[start:]
+
+    page = [dict(entry, uploadDate=format_upload_date(entry['uploadDate']))
+            for entry in page]
+    body = {'banners': [entry['url'] for entry in page], 'files': page}
+    if limit is not None:
+        body['next_after'] = page[-1]['id'] if start + limit < len(files) else None
+        body['total'] = len(files)
+    return jsonify(body), 200
+
+
+def format_upload_date(value):
+    """ISO 8601 text for a banner's upload date (GridFS dates are naive UTC)."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat().replace('+00:00', 'Z')
+
+
+# (UPLOAD_FOLDER mtime_ns, listing) for the disk fallback
+_disk_banner_cache = (None, [])
+
+
+def list_disk_banners():
+    """Return metadata of the banners in UPLOAD_FOLDER, oldest first.
+
+    Cached until the folder's mtime changes, which happens whenever a file
+    is added, renamed into place or removed there.
+    """
+    global _disk_banner_cache
+    key = os.stat(UPLOAD_FOLDER).st_mtime_ns
+    if _disk_banner_cache[0] == key:
+        return _disk_banner_cache[1]
+    files = []
+    with os.scandir(UPLOAD_FOLDER) as entries:
+        for entry in entries:
+            if not entry.is_file() or not allowed_file(entry.name):
+                continue
+            stat = entry.stat()
+            files.append({
+                'id': entry.name,
+                'filename': entry.name,
+                'length': stat.st_size,
+                'uploadDate': datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+                'contentType': mimetypes.guess_type(entry.name)[0],
+                'url': f'/api/uploads/{entry.name}',
+            })
+    files.sort(key=lambda f: (f['uploadDate'], f['id']))
+    _disk_banner_cache = (key, files)
+    return files
 
 
 @app.route('/api/banners/<identifier>', methods=['DELETE'])
@@ -227,7 +541,8 @@ def delete_banner(identifier):
     # If identifier looks like ObjectId (24 hex chars), attempt GridFS
     if len(identifier) == 24 and db_manager.connected:
         try:
-            result = db_manager.fs.delete(ObjectId(identifier))
+            for deleted_id in db_manager.delete_file(identifier):
+                file_cache.discard(deleted_id)
             return jsonify({'success': True, 'file_id': identifier}), 200
         except Exception as e:
             logger.error(f'Error deleting GridFS file: {str(e)}')
@@ -240,6 +555,11 @@ def delete_banner(identifier):
         return jsonify({'error': f'Invalid file type. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
     if os.path.exists(file_path):
         os.remove(file_path)
+        for width in IMAGE_VARIANT_WIDTHS:
+            variant_path = os.path.join(
+                UPLOAD_FOLDER, variant_name(filename, width))
+            if os.path.exists(variant_path):
+                os.remove(variant_path)
         return jsonify({'success': True, 'filename': filename}), 200
     else:
         return jsonify({'error': 'File not found.'}), 404
@@ -247,18 +567,37 @@ def delete_banner(identifier):
 
 @app.route('/api/uploads/<filename>')
 def uploaded_file(filename):
-    logger.info(f'Attempting to serve file: {filename}')
-    logger.info(f'Upload folder: {UPLOAD_FOLDER}')
+    width = requested_width()
+    if width:
+        # Serve the narrowest generated variant that covers the width
+        for candidate in sorted(IMAGE_VARIANT_WIDTHS):
+            variant = variant_name(filename, candidate)
+            if candidate >= width and \
+                    os.path.exists(os.path.join(UPLOAD_FOLDER, variant)):
+                filename = variant
+                break
     file_path = os.path.join(UPLOAD_FOLDER, filename)
-    logger.info(f'Full file path: {file_path}')
 
-    if not os.path.exists(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
         logger.error(f'File not found: {file_path}')
         return jsonify({'error': 'File not found'}), 404
 
+    # Files on disk can be overwritten by name, so clients revalidate
+    etag = f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+    last_modified = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+    if is_not_modified(etag, last_modified):
+        return not_modified_response(etag, last_modified, UPLOAD_CACHE_CONTROL)
+
     try:
-        logger.info(f'File exists, size: {os.path.getsize(file_path)} bytes')
-        response = send_from_directory(UPLOAD_FOLDER, filename)
+        # Hot path: let the logger skip formatting when DEBUG is off
+        logger.debug('Serving file %s (%s bytes)', file_path, stat.st_size)
+        response = send_from_directory(
+            UPLOAD_FOLDER, filename, etag=etag, last_modified=last_modified)
+        response.headers['Cache-Control'] = UPLOAD_CACHE_CONTROL
+        if 'w' in request.args:
+            response.vary.add('Accept')
 
         # Use the add_cors_headers function
         response = add_cors_headers(response)
@@ -275,54 +614,403 @@ def uploaded_file(filename):
 
 @app.route('/api/files/<file_id>')
 def get_file(file_id):
-    """Serve files stored in GridFS."""
+    """Serve files stored in GridFS, streamed chunk by chunk.
+
+    Single byte ranges (``Range: bytes=...``) are answered with 206.
+    ``?w=`` redirects to the narrowest WebP variant covering that width, and
+    serves the original, to be revalidated, until that variant exists.
+    """
     if not db_manager.connected:
         return jsonify({'error': 'Database not available'}), 503
+    # GridFS files never change under their ObjectId, so only a URL naming
+    # the served id exactly may be cached for good
+    cache_control = GRIDFS_CACHE_CONTROL
+    if 'w' in request.args:
+        cache_control = VARIANT_CACHE_CONTROL
+        width = requested_width()
+        variant_id = None
+        if width:
+            try:
+                variant_id = db_manager.find_variant(file_id, width)
+            except Exception:
+                pass  # invalid ids are reported as 404 below
+        if variant_id:
+            response = redirect(f'/api/files/{variant_id}')
+            response.headers['Cache-Control'] = UPLOAD_CACHE_CONTROL
+            response.vary.add('Accept')
+            return response
+    # The id is the ETag, so a matching If-None-Match needs no database
+    # lookup at all
+    if is_not_modified(file_id):
+        return not_modified_response(file_id, None, cache_control)
+    cached_path = file_cache.get(file_id)
+    if cached_path is not None:
+        try:
+            return send_cached_file(cached_path, file_id, cache_control)
+        except OSError:
+            # Evicted by another thread or worker since get(); use GridFS
+            file_cache.discard(file_id)
     try:
-        grid_out = db_manager.fs.get(ObjectId(file_id))
-        data = grid_out.read()
-        response = make_response(data)
-        response.headers['Content-Type'] = 'image/png'
-        return response
+        grid_out = db_manager.open_file(file_id)
     except Exception as e:
         logger.error(f'Error retrieving file {file_id}: {str(e)}')
         return jsonify({'error': 'File not found'}), 404
 
+    last_modified = grid_out.upload_date.replace(tzinfo=timezone.utc)
+    if is_not_modified(file_id, last_modified):
+        grid_out.close()
+        return not_modified_response(file_id, last_modified, cache_control)
+
+    # Later requests are served from the local cache once this copy is done
+    file_cache.fill_async(file_id, grid_out.length)
+
+    length = grid_out.length
+    start, stop, status = 0, length, 200
+    if request.range is not None:
+        byte_range = request.range.range_for_length(length)
+        if byte_range is None:
+            response = make_response('', 416)
+            response.headers['Content-Range'] = f'bytes */{length}'
+            return response
+        start, stop = byte_range
+        status = 206
+
+    response = Response(stream_grid_out(grid_out, start, stop), status=status,
+                        mimetype=grid_file_type(grid_out))
+    response.headers['Content-Length'] = str(stop - start)
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Cache-Control'] = cache_control
+    response.set_etag(file_id)
+    response.last_modified = last_modified
+    if 'w' in request.args:
+        response.vary.add('Accept')
+    if status == 206:
+        response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{length}'
+    return response
+
+
+def send_cached_file(path, file_id, cache_control):
+    """Serve a GridFS file from the local cache.
+
+    send_file hands the open file to the server's wsgi.file_wrapper (or to
+    the front-end proxy when USE_X_SENDFILE is set), and evaluates Range and
+    conditional headers itself.
+    """
+    response = send_file(path, conditional=True, etag=file_id)
+    response.headers['Cache-Control'] = cache_control
+    if 'w' in request.args:
+        response.vary.add('Accept')
+    return response
+
+
+def is_not_modified(etag, last_modified=None):
+    """Evaluate If-None-Match / If-Modified-Since against a resource."""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def not_modified_response(etag, last_modified, cache_control):
+    """Build a bodiless 304 carrying the validators and caching policy."""
+    response = make_response('', 304)
+    if 'w' in request.args:
+        response.vary.add('Accept')
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def grid_file_type(grid_out):
+    """Content type recorded at upload, else guessed from the filename."""
+    metadata = grid_out.metadata or {}
+    return metadata.get('contentType') \
+        or mimetypes.guess_type(grid_out.filename or '')[0] \
+        or 'application/octet-stream'
+
+
+def stream_grid_out(grid_out, start, stop):
+    """Yield bytes [start, stop) of a GridOut one chunk at a time."""
+    try:
+        grid_out.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            data = grid_out.read(min(grid_out.chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        grid_out.close()
+
+
+def build_participant(data):
+    """Validate submitted participant data and return the record to store."""
+    if not isinstance(data, dict) or not data.get('name'):
+        raise ValueError('Name ist erforderlich.')
+    # The admin UI numbers events by banner, so that is the default event
+    banner = data.get('banner')
+    event = data.get('event')
+    if event is None or event == '':
+        event = banner
+    return {
+        'name': data.get('name'),
+        'email': data.get('email'),
+        'message': data.get('message'),
+        # Stored as text so filters and stats never mix numbers and strings
+        'banner': str(banner) if banner is not None else None,
+        'event': str(event) if event is not None else '',
+        # Same format as JavaScript's toISOString() so strings sort by time
+        'timestamp': datetime.now(timezone.utc).strftime(
+            '%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+    }
+
 
 @app.route('/api/participants', methods=['POST'])
 def add_participant():
     data = request.get_json()
-    name = data.get('name')
-    email = data.get('email')
-    message = data.get('message')
-    banner = data.get('banner')
-    if not name:
-        return jsonify({'error': 'Name ist erforderlich.'}), 400
-    participant = {
-        'name': name,
-        'email': email,
-        'message': message,
-        'banner': banner
-    }
-    participants = load_participants()
-    participants.append(participant)
-    save_participants(participants)
-    return jsonify({'success': True, 'participant': participant}), 201
+    try:
+        participant = build_participant(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        record, status = db_manager.submit_participant(participant)
+    except WriteQueueFull:
+        response = jsonify(
+            {'error': 'Zu viele Anmeldungen, bitte gleich erneut versuchen.'})
+        response.headers['Retry-After'] = str(WRITE_BEHIND_RETRY_AFTER)
+        return response, 503
+    if status == 'duplicate':
+        # Repeated signup: hand back the stored record instead of a new one
+        return jsonify({'success': True, 'participant': record,
+                        'duplicate': True}), 200
+    return jsonify({'success': True, 'participant': record}), \
+        202 if status == 'queued' else 201
 
 
 @app.route('/api/participants', methods=['GET'])
 @jwt_required
 def get_participants():
+    """List participants.
+
+    Without query parameters the full list is returned as before.
+    ``limit``/``after`` page through the list by cursor and ``stream=1``
+    writes the JSON array out element by element. ``name``/``email``
+    (prefix), ``event``/``banner`` (repeatable) and ``since``/``until``
+    filter it.
+    """
+    after = request.args.get('after') or None
+    stream = request.args.get('stream') in ('1', 'true')
+    filters = participant_filters()
     try:
-        participants = load_participants()
-        response = jsonify({'participants': participants})
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if stream:
+            return stream_participants(after, limit, filters)
+
+        participants = []
+        next_after = None
+        rows = db_manager.iter_participants(after, limit, filters)
+        for cursor, participant in rows:
+            participants.append(participant)
+            next_after = cursor
+        body = {'participants': participants}
+        if limit is not None:
+            body['next_after'] = next_after if len(
+                participants) == limit else None
+            body['total'] = db_manager.count_participants(filters)
         # Use the after_request handler to add CORS headers
-        return response, 200
+        return jsonify(body), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f'Error getting participants: {str(e)}')
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/participants/stats', methods=['GET'])
+@jwt_required
+def participant_stats():
+    """Signup counts per banner and per day for reporting."""
+    try:
+        return jsonify(db_manager.participant_stats()), 200
+    except Exception as e:
+        logger.error(f'Error computing participant stats: {str(e)}')
+        return jsonify({'error': str(e)}), 500
+
+
+def participant_filters():
+    """Collect participant search filters from the query string."""
+    filters = {}
+    for field in ('name', 'email', 'since', 'until'):
+        if request.args.get(field):
+            filters[field] = request.args[field]
+    for field in ('event', 'banner'):
+        if field in request.args:
+            filters[field] = request.args.getlist(field)
+    return filters
+
+
+def stream_participants(after, limit, filters=None):
+    """Stream participants as a JSON document without building the list."""
+    rows = db_manager.iter_participants(after, limit, filters)
+    # Pull the first row eagerly so a bad cursor still yields a 400
+    first = next(rows, None)
+
+    def generate():
+        yield '{"participants": ['
+        row = first
+        last_cursor = None
+        count = 0
+        while row is not None:
+            cursor, participant = row
+            if count:
+                yield ','
+            yield json.dumps(participant, ensure_ascii=False, default=str)
+            last_cursor = cursor
+            count += 1
+            row = next(rows, None)
+        yield ']'
+        if limit is not None:
+            next_after = last_cursor if count == limit else None
+            yield f', "next_after": {json.dumps(next_after)}'
+        yield '}'
+
+    return Response(stream_with_context(generate()),
+                    mimetype='application/json')
+
+
+def read_import_rows():
+    """Yield ``(row_number, data)`` from an NDJSON or CSV import request.
+
+    The body may be sent raw or as a multipart ``file`` field. Rows that
+    cannot be parsed are yielded with a ValueError instead of data.
+    """
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            raise ValueError('No file part')
+        stream, name = upload.stream, upload.filename or ''
+        mimetype = upload.mimetype
+    else:
+        stream, name, mimetype = request.stream, '', request.mimetype
+
+    fmt = request.args.get('format')
+    if not fmt:
+        is_csv = mimetype == 'text/csv' or name.lower().endswith('.csv')
+        fmt = 'csv' if is_csv else 'ndjson'
+    if fmt not in ('csv', 'ndjson'):
+        raise ValueError('Unsupported format. Use csv or ndjson.')
+
+    lines = (line.decode('utf-8-sig') for line in stream)
+    if fmt == 'csv':
+        for row_number, row in enumerate(csv.DictReader(lines), start=1):
+            yield row_number, row
+        return
+
+    for row_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, ValueError(f'Invalid JSON: {e.msg}')
+
+
+@app.route('/api/participants/import', methods=['POST'])
+@jwt_required
+def import_participants():
+    """Bulk import participants from NDJSON or CSV in batches."""
+    imported = 0
+    errors = []
+    batch, batch_rows = [], []
+
+    def flush():
+        failed = db_manager.insert_participants(batch)
+        for index, error in failed:
+            errors.append({'row': batch_rows[index], 'error': error})
+        written = len(batch) - len(failed)
+        batch.clear()
+        batch_rows.clear()
+        return written
+
+    try:
+        for row_number, data in read_import_rows():
+            if isinstance(data, ValueError):
+                errors.append({'row': row_number, 'error': str(data)})
+                continue
+            try:
+                participant = build_participant(data)
+            except ValueError as e:
+                errors.append({'row': row_number, 'error': str(e)})
+                continue
+            if data.get('timestamp'):
+                participant['timestamp'] = data['timestamp']
+            batch.append(participant)
+            batch_rows.append(row_number)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                imported += flush()
+        imported += flush()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f'Error importing participants: {str(e)}')
+        return jsonify({'error': str(e), 'imported': imported,
+                        'errors': errors}), 500
+
+    return jsonify({'success': True, 'imported': imported,
+                    'errors': errors}), 200
+
+
+@app.route('/api/participants/export', methods=['GET'])
+@jwt_required
+def export_participants():
+    """Stream participants as NDJSON or CSV, filtered like the listing."""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Unsupported format. Use csv or ndjson.'}), 400
+    filters = participant_filters()
+
+    def generate():
+        rows = db_manager.iter_participants(filters=filters)
+        if fmt == 'ndjson':
+            for _, participant in rows:
+                yield json.dumps(participant, ensure_ascii=False,
+                                 default=str) + '\n'
+            return
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS,
+                                extrasaction='ignore')
+        writer.writeheader()
+        for _, participant in rows:
+            # Legacy records have no event; export the one they fall back to
+            row = dict(participant, event=participant_event(participant))
+            writer.writerow({field: csv_safe(row.get(field))
+                             for field in EXPORT_FIELDS})
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename=participants.{fmt}'
+    return response
+
+
+def csv_safe(value):
+    """Neutralise cells a spreadsheet would evaluate as a formula."""
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
 @app.route('/api/participants', methods=['OPTIONS'])
 def participants_options():
     return create_options_response()
@@ -403,6 +1091,40 @@ def list_sections():
     return jsonify({'sections': sections}), 200
 
 
+@app.route('/api/content/<language>', methods=['GET'])
+def content_bundle(language):
+    """Public, read-only bundle of every CMS section in one language."""
+    if language not in content_manager.supported_languages:
+        return jsonify({'error': 'Unsupported language'}), 404
+    bundle = content_manager.get_bundle(language)
+
+    use_gzip = request.accept_encodings['gzip'] > 0
+    # Each encoding is its own representation with its own strong ETag
+    etag = f"{bundle['etag']}-gzip" if use_gzip else bundle['etag']
+    if is_not_modified(etag):
+        response = not_modified_response(etag, None, BUNDLE_CACHE_CONTROL)
+        response.vary.add('Accept-Encoding')
+        return response
+
+    response = Response(bundle['gzip'] if use_gzip else bundle['body'],
+                        mimetype='application/json')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = BUNDLE_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+@app.route('/api/cms/stats', methods=['GET'])
+@jwt_required
+def cms_stats():
+    return jsonify({
+        'cache': content_manager.cache_stats(),
+        'translation_memory': content_manager.translation_memory.stats()
+    }), 200
+
+
 @app.route('/api/cms/content/<section>', methods=['DELETE'])
 @jwt_required
 def delete_content(section):
@@ -430,7 +1152,8 @@ def index():
             'login': '/api/login',
             'banners': '/api/banners',
             'participants': '/api/participants',
-            'cms': '/api/cms/content/<section>'
+            'cms': '/api/cms/content/<section>',
+            'content': '/api/content/<language>'
         }
     }), 200
 
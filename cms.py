@@ -1,21 +1,80 @@
 import os
 import json
+import gzip
+import hashlib
 import frontmatter
 import markdown
 from deep_translator import GoogleTranslator
 import yaml
-from datetime import datetime
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
 from typing import Dict, List, Optional
 import i18n
+from file_utils import write_atomic
+from translation_memory import TranslationMemory
+
+# Extensions passed to markdown.markdown. Changing them (or upgrading
+# Markdown) changes RENDERER_VERSION, which marks stored HTML as stale.
+MARKDOWN_EXTENSIONS: List[str] = []
+RENDERER_VERSION = f"markdown-{markdown.__version__}:{','.join(MARKDOWN_EXTENSIONS)}"
+
+
+def render_markdown(content: str) -> str:
+    return markdown.markdown(content, extensions=MARKDOWN_EXTENSIONS)
+
+
+def _encode_manifest_value(value):
+    """JSON encoding for frontmatter values YAML parses into dates"""
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    raise TypeError(f'Cannot store {type(value).__name__} in manifest')
+
+
+def _encode_bundle_value(value):
+    """JSON encoding for dates in bundle metadata"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'Cannot encode {type(value).__name__} in bundle')
+
+
+def _decode_manifest_object(obj):
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj:
+        return date.fromisoformat(obj['__date__'])
+    return obj
 
 
 class ContentManager:
-    def __init__(self, content_dir: str = "content"):
+    def __init__(self, content_dir: str = "content", cache_max_entries: int = 256,
+                 cache_max_bytes: int = 8 * 1024 * 1024):
         self.content_dir = content_dir
         self.supported_languages = ['de', 'en', 'tr', 'ru', 'ar']
         self.default_language = 'de'
         self._ensure_content_directory()
-        self.translation_memory = self._load_translation_memory()
+        self.translation_memory = TranslationMemory(
+            os.path.join(self.content_dir, 'translation_memory.sqlite3'))
+
+        # Parsed sections: (section, language) -> (mtime_ns, size, nbytes, content)
+        self.cache_max_entries = cache_max_entries
+        self.cache_max_bytes = cache_max_bytes
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_lock = threading.Lock()
+
+        # Section metadata per language, persisted under .manifest/ and
+        # mirrored here: language -> (manifest mtime_ns, {section: entry})
+        self._manifests = {}
+        self._manifest_lock = threading.Lock()
+
+        # Public content bundles: language -> (source validators, bundle)
+        self._bundles = {}
+        self._bundle_lock = threading.Lock()
 
     def _ensure_content_directory(self):
         """Ensure content directory and structure exists"""
@@ -28,20 +87,6 @@ class ContentManager:
             if not os.path.exists(lang_dir):
                 os.makedirs(lang_dir)
 
-    def _load_translation_memory(self) -> Dict:
-        """Load translation memory from file"""
-        memory_file = os.path.join(self.content_dir, 'translation_memory.json')
-        if os.path.exists(memory_file):
-            with open(memory_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
-
-    def _save_translation_memory(self):
-        """Save translation memory to file"""
-        memory_file = os.path.join(self.content_dir, 'translation_memory.json')
-        with open(memory_file, 'w', encoding='utf-8') as f:
-            json.dump(self.translation_memory, f, ensure_ascii=False, indent=2)
-
     def create_content(self, section: str, title: str, content: str, metadata: Dict = None) -> bool:
         """Create new content in the default language"""
         if metadata is None:
@@ -61,8 +106,10 @@ class ContentManager:
         file_path = os.path.join(
             self.content_dir, self.default_language, filename)
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            frontmatter.dump(content_with_meta, f)
+        self._write_post(file_path, content_with_meta)
+        self._invalidate(section, self.default_language)
+        self._update_manifest(section, self.default_language)
+        self._refresh_bundle(self.default_language)
 
         return True
 
@@ -87,31 +134,137 @@ class ContentManager:
             existing_metadata['updated_at'] = datetime.now().isoformat()
 
             content_with_meta = frontmatter.Post(content, **existing_metadata)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                frontmatter.dump(content_with_meta, f)
+            self._write_post(file_path, content_with_meta)
+            self._invalidate(section, language)
+            self._update_manifest(section, language)
+            self._refresh_bundle(language)
             return True
 
         return False
 
+    @classmethod
+    def _write_post(cls, file_path: str, post: frontmatter.Post):
+        """Write a post to its Markdown file and render its HTML next to it"""
+        # frontmatter.dump writes bytes, which text-mode files reject
+        write_atomic(file_path, frontmatter.dumps(post))
+        cls._write_html(file_path, render_markdown(post.content))
+
+    @staticmethod
+    def _html_path(file_path: str) -> str:
+        return file_path[:-len('.md')] + '.html'
+
+    @classmethod
+    def _write_html(cls, file_path: str, html: str):
+        """Store rendered HTML for a Markdown file, stamped with the renderer
+        version and the source file's mtime/size"""
+        stat = os.stat(file_path)
+        stamp = json.dumps({'renderer': RENDERER_VERSION,
+                            'source': [stat.st_mtime_ns, stat.st_size]})
+        write_atomic(cls._html_path(file_path), f'<!-- {stamp} -->\n{html}')
+
+    @classmethod
+    def _read_html(cls, file_path: str, stat) -> Optional[str]:
+        """Stored HTML for a Markdown file, or None if missing or stale"""
+        try:
+            with open(cls._html_path(file_path), 'r', encoding='utf-8') as f:
+                header = f.readline()
+                html = f.read()
+        except OSError:
+            return None
+        try:
+            stamp = json.loads(header.strip()[len('<!--'):-len('-->')])
+        except ValueError:
+            return None
+        if stamp.get('renderer') != RENDERER_VERSION or \
+                stamp.get('source') != [stat.st_mtime_ns, stat.st_size]:
+            return None
+        return html
+
     def get_content(self, section: str, language: str = None) -> Optional[Dict]:
-        """Retrieve content by section and language"""
+        """Retrieve content by section and language
+
+        Parsed sections are cached and reused while the file's mtime and
+        size are unchanged, so repeated reads skip frontmatter and Markdown.
+        """
         if language is None:
             language = self.default_language
 
         filename = f"{section}.md"
         file_path = os.path.join(self.content_dir, language, filename)
+        key = (section, language)
 
-        if not os.path.exists(file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            self._invalidate(section, language)
             return None
 
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._cache.move_to_end(key)
+                self._cache_hits += 1
+                return self._copy_content(entry[3])
+            self._cache_misses += 1
+
         with open(file_path, 'r', encoding='utf-8') as f:
             post = frontmatter.load(f)
 
-        return {
+        # HTML is rendered when content is written; render here only for
+        # files edited by hand or stored by an older renderer
+        html = self._read_html(file_path, stat)
+        if html is None:
+            html = render_markdown(post.content)
+            self._write_html(file_path, html)
+
+        result = {
             'content': post.content,
             'metadata': post.metadata,
-            'html': markdown.markdown(post.content)
+            'html': html
         }
+        self._cache_store(key, stat, result)
+        return self._copy_content(result)
+
+    @staticmethod
+    def _copy_content(content: Dict) -> Dict:
+        """Copy a cached section so callers can modify its metadata"""
+        return dict(content, metadata=dict(content['metadata']))
+
+    def _cache_store(self, key, stat, content: Dict):
+        """Add a parsed section to the cache, evicting the least recently used"""
+        nbytes = len(content['content'].encode('utf-8')) + \
+            len(content['html'].encode('utf-8'))
+        if nbytes > self.cache_max_bytes or self.cache_max_entries <= 0:
+            return
+        with self._cache_lock:
+            old = self._cache.pop(key, None)
+            if old:
+                self._cache_bytes -= old[2]
+            self._cache[key] = (stat.st_mtime_ns, stat.st_size, nbytes, content)
+            self._cache_bytes += nbytes
+            while len(self._cache) > self.cache_max_entries or \
+                    self._cache_bytes > self.cache_max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted[2]
+
+    def _invalidate(self, section: str, language: str):
+        """Drop a section from the cache after it was written or deleted"""
+        with self._cache_lock:
+            old = self._cache.pop((section, language), None)
+            if old:
+                self._cache_bytes -= old[2]
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters and current size of the content cache"""
+        with self._cache_lock:
+            lookups = self._cache_hits + self._cache_misses
+            return {
+                'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'hit_rate': self._cache_hits / lookups if lookups else 0.0,
+                'entries': len(self._cache),
+                'bytes': self._cache_bytes,
+            }
 
     def translate_content(self, section: str, target_language: str) -> bool:
         """Translate content to target language"""
@@ -123,20 +276,20 @@ class ContentManager:
             return False
 
         # Check translation memory
-        content_hash = hash(source_content['content'])
-        if content_hash in self.translation_memory.get(target_language, {}):
-            translated_content = self.translation_memory[target_language][content_hash]
-        else:
+        source_text = source_content['content']
+        translated_content = self.translation_memory.get(
+            self.default_language, target_language, source_text)
+        if translated_content is None:
             # Translate using Google Translator with error handling
             try:
-                translator = GoogleTranslator(source='de', target=target_language)
-                translated_content = translator.translate(source_content['content'])
+                translator = GoogleTranslator(
+                    source=self.default_language, target=target_language)
+                translated_content = translator.translate(source_text)
 
                 # Save to translation memory
-                if target_language not in self.translation_memory:
-                    self.translation_memory[target_language] = {}
-                self.translation_memory[target_language][content_hash] = translated_content
-                self._save_translation_memory()
+                self.translation_memory.put(
+                    self.default_language, target_language, source_text,
+                    translated_content)
 
             except Exception as e:
                 # Handle rate limiting and API errors
@@ -153,28 +306,131 @@ class ContentManager:
         return self.update_content(section, translated_content, metadata, target_language)
 
     def list_sections(self, language: str = None) -> List[Dict]:
-        """List all available content sections"""
+        """List all available content sections
+
+        Metadata comes from the language's manifest. A directory scan
+        (stat only) catches files changed behind our back, e.g. by another
+        worker; only those are parsed again, and nothing is rendered.
+        """
         if language is None:
             language = self.default_language
 
-        sections = []
-        content_path = os.path.join(self.content_dir, language)
+        current = self._current_manifest(language)
+        return [{'section': section, 'metadata': dict(current[section]['metadata'])}
+                for section in sorted(current)]
 
+    def _current_manifest(self, language: str) -> Dict:
+        """Validate a language's manifest against its files and return it"""
+        content_path = os.path.join(self.content_dir, language)
         if not os.path.exists(content_path):
-            return sections
-
-        for filename in os.listdir(content_path):
-            if filename.endswith('.md'):
-                section = filename[:-3]
-                content = self.get_content(section, language)
-                if content:
-                    sections.append({
-                        'section': section,
-                        'metadata': content['metadata']
-                    })
-
+            return {}
+
+        with self._manifest_lock:
+            manifest = self._load_manifest(language)
+            current = {}
+            with os.scandir(content_path) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.md') or not entry.is_file():
+                        continue
+                    section = entry.name[:-3]
+                    stat = entry.stat()
+                    item = manifest.get(section)
+                    if item is None or (item['mtime_ns'], item['size']) != \
+                            (stat.st_mtime_ns, stat.st_size):
+                        item = self._manifest_entry(entry.path, stat)
+                    current[section] = item
+            if current != manifest:
+                self._save_manifest(language, current)
+        return current
+
+    def get_bundle(self, language: str) -> Dict:
+        """All sections of a language as one JSON document, ready to serve
+
+        Returns ``{'body', 'gzip', 'etag'}`` with the encoded JSON, its
+        gzip form and a strong ETag (SHA-256 of the body). Bundles are
+        rebuilt after writes and whenever the validated manifest differs
+        from the one a bundle was built from.
+        """
+        current = self._current_manifest(language)
+        source = [[section, current[section]['mtime_ns'], current[section]['size']]
+                  for section in sorted(current)]
+        with self._bundle_lock:
+            cached = self._bundles.get(language)
+            if cached and cached[0] == source:
+                return cached[1]
+
+        sections = {}
+        for section, _, _ in source:
+            content = self.get_content(section, language)
+            if content:
+                sections[section] = content
+        body = json.dumps({'language': language, 'sections': sections},
+                          ensure_ascii=False, sort_keys=True,
+                          default=_encode_bundle_value).encode('utf-8')
+        bundle = {
+            'body': body,
+            'gzip': gzip.compress(body, mtime=0),
+            'etag': hashlib.sha256(body).hexdigest(),
+        }
+        with self._bundle_lock:
+            self._bundles[language] = (source, bundle)
+        return bundle
+
+    def _refresh_bundle(self, language: str):
+        """Regenerate a language's bundle after one of its sections changed"""
+        with self._bundle_lock:
+            self._bundles.pop(language, None)
+        self.get_bundle(language)
+
+    def _manifest_path(self, language: str) -> str:
+        return os.path.join(self.content_dir, '.manifest', f'{language}.json')
+
+    @staticmethod
+    def _manifest_entry(file_path: str, stat) -> Dict:
+        """Manifest entry for a section file: its metadata and validators"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            post = frontmatter.load(f)
+        return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                'metadata': post.metadata}
+
+    def _load_manifest(self, language: str) -> Dict:
+        """Return the manifest of a language (caller holds the manifest lock)"""
+        path = self._manifest_path(language)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return {}
+        cached = self._manifests.get(language)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                sections = json.load(f, object_hook=_decode_manifest_object)
+        except ValueError:
+            return {}  # Rebuilt by the next list_sections
+        self._manifests[language] = (mtime_ns, sections)
         return sections
 
+    def _save_manifest(self, language: str, sections: Dict):
+        """Atomically replace a language's manifest (caller holds the lock)"""
+        path = self._manifest_path(language)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, json.dumps(sections, ensure_ascii=False,
+                                      default=_encode_manifest_value))
+        self._manifests[language] = (os.stat(path).st_mtime_ns, sections)
+
+    def _update_manifest(self, section: str, language: str):
+        """Refresh one section's manifest entry after it was written or deleted"""
+        file_path = os.path.join(self.content_dir, language, f"{section}.md")
+        with self._manifest_lock:
+            sections = dict(self._load_manifest(language))
+            try:
+                sections[section] = self._manifest_entry(
+                    file_path, os.stat(file_path))
+            except FileNotFoundError:
+                sections.pop(section, None)
+            self._save_manifest(language, sections)
+
     def delete_content(self, section: str, language: str = None) -> bool:
         """Delete content for a specific section"""
         if language is None:
@@ -185,6 +441,53 @@ class ContentManager:
 
         if os.path.exists(file_path):
             os.remove(file_path)
+            if os.path.exists(self._html_path(file_path)):
+                os.remove(self._html_path(file_path))
+            self._invalidate(section, language)
+            self._update_manifest(section, language)
+            self._refresh_bundle(language)
             return True
 
         return False
+
+    def rerender_all(self, force: bool = False) -> int:
+        """Re-render stored HTML for every section in every language
+
+        Only stale artifacts are rewritten unless force is set, so this can
+        run after every deploy. Returns the number of files rendered.
+        """
+        rendered = 0
+        for language in self.supported_languages:
+            content_path = os.path.join(self.content_dir, language)
+            if not os.path.isdir(content_path):
+                continue
+            for filename in sorted(os.listdir(content_path)):
+                if not filename.endswith('.md'):
+                    continue
+                file_path = os.path.join(content_path, filename)
+                if not force and self._read_html(file_path, os.stat(file_path)) is not None:
+                    continue
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    post = frontmatter.load(f)
+                self._write_html(file_path, render_markdown(post.content))
+                self._invalidate(filename[:-3], language)
+                rendered += 1
+        with self._bundle_lock:
+            self._bundles.clear()
+        return rendered
+
+
+if __name__ == '__main__':
+    # python cms.py rerender [--force] [content_dir]
+    import argparse
+
+    parser = argparse.ArgumentParser(description='CMS maintenance commands')
+    parser.add_argument('command', choices=['rerender'])
+    parser.add_argument('content_dir', nargs='?', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'content'))
+    parser.add_argument('--force', action='store_true',
+                        help='re-render sections whose HTML is up to date')
+    args = parser.parse_args()
+
+    count = ContentManager(args.content_dir).rerender_all(force=args.force)
+    print(f"Rendered {count} section(s) with {RENDERER_VERSION}")
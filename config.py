@@ -4,10 +4,60 @@ import os
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
 PARTICIPANTS_FILE = os.path.join(BASE_DIR, 'participants.json')
+# Append-only log used by the JSON fallback; folded into PARTICIPANTS_FILE
+# once it holds PARTICIPANTS_COMPACT_EVERY entries
+PARTICIPANTS_LOG_FILE = os.path.join(BASE_DIR, 'participants.log.jsonl')
+PARTICIPANTS_COMPACT_EVERY = int(os.getenv('PARTICIPANTS_COMPACT_EVERY', 100))
+
+# Write-behind queue for participant signups (off by default). Signups are
+# buffered in memory and written in batches of WRITE_BEHIND_BATCH_SIZE or
+# every WRITE_BEHIND_FLUSH_SECONDS, whichever comes first.
+WRITE_BEHIND_ENABLED = os.getenv(
+    'WRITE_BEHIND_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+WRITE_BEHIND_QUEUE_SIZE = int(os.getenv('WRITE_BEHIND_QUEUE_SIZE', 1000))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', 100))
+WRITE_BEHIND_FLUSH_SECONDS = float(os.getenv('WRITE_BEHIND_FLUSH_SECONDS', 1.0))
+WRITE_BEHIND_RETRY_AFTER = 5  # Seconds sent in Retry-After when the queue is full
 
 # File Upload Settings
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
+UPLOAD_CHUNK_SIZE = 256 * 1024  # Bytes read per step when ingesting uploads
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+BATCH_UPLOAD_MAX_FILES = 20  # Files accepted by one batch banner upload
+BANNER_UPLOAD_WORKERS = int(os.getenv('BANNER_UPLOAD_WORKERS', 4))
+
+# Responsive banner variants (WebP, generated after upload when Pillow is
+# installed). Set IMAGE_VARIANT_WIDTHS to an empty string to disable.
+IMAGE_VARIANT_WIDTHS = [
+    int(w) for w in os.getenv('IMAGE_VARIANT_WIDTHS', '320,640,1280').split(',')
+    if w.strip()
+]
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_VARIANT_WORKERS = int(os.getenv('IMAGE_VARIANT_WORKERS', 2))
+
+# Local disk cache for files served from GridFS (least recently used files
+# are evicted beyond the byte budget). Set GRIDFS_CACHE_MAX_BYTES=0 to disable.
+GRIDFS_CACHE_DIR = os.getenv(
+    'GRIDFS_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'gridfs'))
+GRIDFS_CACHE_MAX_BYTES = int(
+    os.getenv('GRIDFS_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Pagination Settings
+MAX_PAGE_SIZE = 500  # Upper bound for ?limit= on paginated listings
+IMPORT_BATCH_SIZE = 1000  # Rows written per batch by participant imports
+
+# CMS Settings: budget of the in-process cache of parsed sections
+CMS_CACHE_MAX_ENTRIES = int(os.getenv('CMS_CACHE_MAX_ENTRIES', 256))
+CMS_CACHE_MAX_BYTES = int(os.getenv('CMS_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+
+# Logging Settings. LOG_LEVELS sets per-logger levels
+# ("database=DEBUG,werkzeug=WARNING") and LOG_SAMPLE_RATES keeps only a
+# fraction of the INFO/DEBUG records logged while serving an endpoint
+# ("uploaded_file=0.01,get_file=0.01"); warnings and errors are always kept.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # 'json' or 'text'
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+LOG_SAMPLE_RATES = os.getenv('LOG_SAMPLE_RATES', '')
 
 # CORS Settings - Netlify Frontend + Render Backend
 
@@ -1,15 +1,134 @@
 import os
 from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
-from gridfs import GridFS
+from pymongo.errors import (
+    BulkWriteError, ConnectionFailure, DuplicateKeyError, OperationFailure
+)
+from gridfs import GridFS, GridOut
 from bson import ObjectId
 import json
+import hashlib
 import logging
+import re
+import bisect
+import threading
+import queue
+import time
+import atexit
+from collections import Counter
 
-from config import PARTICIPANTS_FILE
+from config import (
+    PARTICIPANTS_FILE, PARTICIPANTS_LOG_FILE, PARTICIPANTS_COMPACT_EVERY,
+    WRITE_BEHIND_ENABLED, WRITE_BEHIND_QUEUE_SIZE, WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_FLUSH_SECONDS
+)
+from file_utils import write_atomic
 
 logger = logging.getLogger(__name__)
 
+# Sentinel telling the write-behind flusher to drain and exit
+_STOP = object()
+
+
+# Participant fields only used internally; never returned to callers
+HIDDEN_FIELDS = {"_id": False, "dedup_key": False,
+                 "name_key": False, "email_key": False}
+# Same, but keeping _id for cursor pagination
+SEARCH_FIELDS = {k: v for k, v in HIDDEN_FIELDS.items() if k != "_id"}
+# fs.files fields needed to list banners, without touching their chunks
+FILE_LISTING_FIELDS = {"filename": True, "length": True, "uploadDate": True,
+                       "metadata.contentType": True}
+
+
+def participant_event(participant: dict):
+    """Return the event a participant signed up for.
+
+    Records stored before events existed fall back to their banner, which
+    the admin UI has always used as the event number.
+    """
+    event = participant.get("event")
+    if event is None or event == "":
+        event = participant.get("banner")
+    return str(event) if event is not None else ""
+
+
+def participant_banner(participant: dict):
+    """Return a participant's banner as a string ("" when unset).
+
+    Older clients sent banner numbers as JSON numbers, so stored values
+    can be ints.
+    """
+    banner = participant.get("banner")
+    return str(banner) if banner not in (None, "") else ""
+
+
+def participant_key(participant: dict):
+    """Return the de-duplication key for a participant, or None.
+
+    Participants are the same when their trimmed, lower-cased email and
+    their event match. Entries without an email are never treated as
+    duplicates.
+    """
+    email = participant.get("email")
+    if not isinstance(email, str) or not email.strip():
+        return None
+    return f"{participant_event(participant)}:{email.strip().lower()}"
+
+
+def search_key(value):
+    """Normalise a name or email for case-insensitive prefix search."""
+    return value.strip().lower() if isinstance(value, str) else ""
+
+
+def _key_expression(field):
+    """Aggregation twin of search_key() for a document field."""
+    return {"$cond": [{"$eq": [{"$type": f"${field}"}, "string"]},
+                      {"$toLower": {"$trim": {"input": f"${field}"}}}, ""]}
+
+
+# Update pipeline deriving the stored keys the way mongo_document() does;
+# the second stage sees the event and email_key set by the first
+MONGO_KEYS_PIPELINE = [
+    {"$set": {
+        "event": {"$toString": {"$ifNull": [
+            {"$cond": [{"$eq": [{"$ifNull": ["$event", ""]}, ""]},
+                       "$banner", "$event"]}, ""]}},
+        "name_key": _key_expression("name"),
+        "email_key": _key_expression("email"),
+    }},
+    {"$set": {"dedup_key": {"$cond": [
+        {"$eq": ["$email_key", ""]}, "$$REMOVE",
+        {"$concat": ["$event", ":", "$email_key"]}]}}},
+]
+
+
+def signup_day(participant: dict):
+    """Return the YYYY-MM-DD day of a participant's timestamp, or None."""
+    timestamp = participant.get("timestamp")
+    if isinstance(timestamp, str) and len(timestamp) >= 10:
+        return timestamp[:10]
+    return None
+
+
+def mongo_document(participant: dict):
+    """Return the MongoDB document for a participant, with internal keys."""
+    doc = dict(participant)
+    if doc.get("banner") is not None:
+        doc["banner"] = participant_banner(participant)
+    doc["event"] = participant_event(participant)
+    doc["name_key"] = search_key(participant.get("name"))
+    doc["email_key"] = search_key(participant.get("email"))
+    key = participant_key(participant)
+    if key is not None:
+        doc["dedup_key"] = key
+    return doc
+
+
+DUPLICATE_ERROR = "Duplicate participant"
+
+
+class WriteQueueFull(Exception):
+    """Raised when the write-behind queue cannot accept another participant."""
+
 
 class DatabaseManager:
     """Handles MongoDB connections with GridFS and falls back to JSON files."""
@@ -21,6 +140,30 @@ class DatabaseManager:
         self.db = None
         self.fs = None
         self.connected = False
+        # Guards the JSON fallback files and the participant cache
+        self._lock = threading.Lock()
+        self._log_entries = None
+        # Parsed participant list (JSON mode) plus the (mtime, size) pairs
+        # of the snapshot and log files it was read at
+        self._participants_cache = None
+        self._cache_key = None
+        # Whether MongoDB enforces participant uniqueness by dedup_key
+        self._unique_dedup = False
+        # participant_key -> record for the JSON cache
+        self._email_index = {}
+        # Prefix/banner index over cache positions, built on first search
+        self._search_index = None
+        # Signup counts per banner and per day, kept current with the cache
+        self._rollups = {"banner": Counter(), "day": Counter()}
+        # event -> cache positions, so one event's rows are found directly
+        self._event_segments = {}
+        self._files_cache = None
+        self._files_cache_key = None
+        # MongoDB participant_stats result and the collection state it saw
+        self._stats_cache = None
+        self._stats_cache_key = None
+        self._write_queue = None
+        self._flusher = None
 
         if self.mongo_uri:
             self._connect()
@@ -28,6 +171,9 @@ class DatabaseManager:
             logger.warning(
                 "MONGODB_URI not set. Falling back to local JSON storage.")
 
+        if WRITE_BEHIND_ENABLED:
+            self.start_write_behind()
+
     def _connect(self):
         """Try to establish a connection to MongoDB and initialise GridFS."""
         try:
@@ -39,11 +185,74 @@ class DatabaseManager:
             self.fs = GridFS(self.db)
             self.connected = True
             logger.info("Successfully connected to MongoDB.")
+            self._init_indexes()
         except ConnectionFailure as exc:
             logger.warning(
                 "MongoDB connection failed: %s. Falling back to JSON.", exc)
             self.connected = False
 
+    def _init_indexes(self):
+        """Create the indexes participant and file queries rely on."""
+        participants = self.db.participants
+        # Migrations run as single server-side updates, so worker boot takes
+        # a few round trips however large the collection is.
+        # Banner filters compare strings; convert numbers stored earlier
+        participants.update_many(
+            {"banner": {"$type": "number"}},
+            [{"$set": {"banner": {"$toString": "$banner"}}}])
+        # Backfill the keys for documents written before they existed
+        participants.update_many(
+            {"$or": [{"name_key": {"$exists": False}},
+                     {"event": {"$exists": False}}]},
+            MONGO_KEYS_PIPELINE)
+        if "dedup_key_unique" not in participants.index_information():
+            self._collapse_duplicates()
+            if "dedup_key" in participants.index_information():
+                # Left by an earlier failed attempt; it blocks the unique one
+                participants.drop_index("dedup_key")
+        try:
+            participants.create_index(
+                "dedup_key", name="dedup_key_unique", unique=True,
+                partialFilterExpression={"dedup_key": {"$type": "string"}})
+            self._unique_dedup = True
+        except OperationFailure as exc:
+            # Existing duplicates block the unique index; lookups still work
+            logger.warning(
+                "Could not create unique participant index: %s", exc)
+            participants.create_index("dedup_key", name="dedup_key")
+            self._unique_dedup = False
+        participants.create_index("name_key")
+        participants.create_index("email_key")
+        participants.create_index([("banner", 1), ("timestamp", 1)])
+        participants.create_index("timestamp")
+        # _id is the creation-ordered pagination key
+        participants.create_index([("event", 1), ("_id", 1)])
+        # Content hash -> GridFS file, for de-duplicating uploads
+        self.db.fs.files.create_index("metadata.sha256")
+        self.db.fs.files.create_index(
+            [("metadata.variant_of", 1), ("metadata.width", 1)])
+
+    def _collapse_duplicates(self):
+        """Delete all but the earliest participant of each dedup_key.
+
+        Older versions rewrote the whole list on every signup and left
+        duplicates behind, which would keep the unique index from building.
+        """
+        participants = self.db.participants
+        groups = participants.aggregate([
+            {"$match": {"dedup_key": {"$type": "string"}}},
+            {"$group": {"_id": "$dedup_key", "keep": {"$min": "$_id"},
+                        "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+        ], allowDiskUse=True)
+        removed = 0
+        for group in groups:
+            duplicates = [i for i in group["ids"] if i != group["keep"]]
+            removed += participants.delete_many(
+                {"_id": {"$in": duplicates}}).deleted_count
+        if removed:
+            logger.warning("Removed %s duplicate participants", removed)
+
     def is_connected(self):
         """Check if MongoDB is connected"""
         return self.client is not None
@@ -53,46 +262,562 @@ class DatabaseManager:
     def get_participants(self):
         """Return all participants as list of dicts."""
         if self.connected and self.db is not None:
-            participants = list(self.db.participants.find({}, {"_id": False}))
+            participants = list(self.db.participants.find({}, HIDDEN_FIELDS))
             logger.debug("Fetched %s participants from MongoDB",
                          len(participants))
             return participants
 
-        # Fallback to JSON file
-        if os.path.exists(PARTICIPANTS_FILE):
-            with open(PARTICIPANTS_FILE, "r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                    logger.debug(
-                        "Fetched %s participants from JSON", len(data))
-                    return data
-                except json.JSONDecodeError:
-                    logger.error(
-                        "Invalid JSON in participants file. Returning empty list.")
-        return []
+        # Fallback to JSON snapshot plus the append log
+        with self._lock:
+            return list(self._load_json_participants())
 
-    def save_participant(self, participant: dict):
-        """Persist a single participant."""
+    def count_participants(self, filters=None):
+        """Return the number of stored participants without loading them.
+
+        MongoDB answers from collection metadata (or the indexes, when
+        filtered); JSON mode uses the length of the participant cache, which
+        is kept current on every write. ``filters`` is described in
+        ``iter_participants``.
+        """
+        if self.connected and self.db is not None:
+            if not filters:
+                return self.db.participants.estimated_document_count()
+            return self.db.participants.count_documents(
+                self._mongo_query(filters))
+        with self._lock:
+            participants = self._load_json_participants()
+            if not filters:
+                return len(participants)
+            return len(self._json_matches(filters))
+
+    def participant_stats(self):
+        """Return the total plus signup counts per banner and per day.
+
+        MongoDB groups the whole collection in one aggregation, which is
+        linear in its size. The result is cached until the document count or
+        the newest ``_id`` changes, as participants are only ever inserted;
+        checking that costs a metadata read and one ``_id`` index lookup.
+        JSON mode reads the rollups maintained on write. Days are the UTC
+        date part of the timestamp; entries without one only count towards
+        the banner totals. Callers must not modify the returned dict.
+        """
+        if self.connected and self.db is not None:
+            participants = self.db.participants
+            newest = next(participants.find({}, {"_id": True})
+                          .sort("_id", -1).limit(1), None)
+            key = (participants.estimated_document_count(),
+                   newest["_id"] if newest else None)
+            with self._lock:
+                if self._stats_cache is not None \
+                        and self._stats_cache_key == key:
+                    return self._stats_cache
+            result = next(participants.aggregate([
+                {"$facet": {
+                    "banner": [
+                        # Key by the string form, as in JSON mode
+                        {"$group": {"_id": {"$toString": {
+                                        "$ifNull": ["$banner", ""]}},
+                                    "count": {"$sum": 1}}}],
+                    "day": [
+                        {"$match": {"timestamp": {"$type": "string"}}},
+                        {"$group": {"_id": {"$substrBytes": ["$timestamp", 0, 10]},
+                                    "count": {"$sum": 1}}}],
+                }}
+            ]))
+            by_banner = {row["_id"]: row["count"] for row in result["banner"]}
+            by_day = {row["_id"]: row["count"] for row in result["day"]}
+            stats = self._stats(by_banner, by_day)
+            with self._lock:
+                self._stats_cache = stats
+                self._stats_cache_key = key
+            return stats
+        with self._lock:
+            self._load_json_participants()
+            by_banner = dict(self._rollups["banner"])
+            by_day = dict(self._rollups["day"])
+        return self._stats(by_banner, by_day)
+
+    @staticmethod
+    def _stats(by_banner, by_day):
+        """Shape the participant_stats result."""
+        return {
+            "total": sum(by_banner.values()),
+            "by_banner": by_banner,
+            "by_day": dict(sorted(by_day.items())),
+        }
+
+    def iter_participants(self, after=None, limit=None, filters=None):
+        """Yield ``(cursor, participant)`` pairs in insertion order.
+
+        ``after`` is an opaque cursor previously yielded by this method: the
+        ObjectId string in MongoDB, the record position in JSON mode. Raises
+        ValueError for malformed cursors.
+
+        ``filters`` may hold ``name`` and ``email`` (case-insensitive
+        prefixes), ``event`` and ``banner`` (lists of accepted values, ``""``
+        also matching a missing value), and ``since``/``until`` (ISO
+        timestamps, inclusive and exclusive).
+        """
+        if self.connected and self.db is not None:
+            query = self._mongo_query(filters or {})
+            if after:
+                if not ObjectId.is_valid(after):
+                    raise ValueError("Invalid cursor")
+                query["_id"] = {"$gt": ObjectId(after)}
+            cursor = self.db.participants.find(
+                query, SEARCH_FIELDS).sort("_id", 1)
+            if limit:
+                cursor = cursor.limit(limit)
+            for doc in cursor:
+                doc_id = doc.pop("_id")
+                yield str(doc_id), doc
+            return
+
+        start = 0
+        if after:
+            try:
+                start = int(after) + 1
+            except ValueError:
+                raise ValueError("Invalid cursor")
+        with self._lock:
+            participants = self._load_json_participants()
+            positions = self._json_matches(filters) if filters else None
+        if positions is None:
+            end = start + limit if limit else len(participants)
+            positions = range(start, min(end, len(participants)))
+        else:
+            positions = positions[bisect.bisect_left(positions, start):]
+            if limit:
+                positions = positions[:limit]
+        for position in positions:
+            yield str(position), participants[position]
+
+    def _mongo_query(self, filters):
+        """Translate participant filters into a MongoDB query."""
+        query = {}
+        for field in ("name", "email"):
+            if filters.get(field):
+                prefix = re.escape(search_key(filters[field]))
+                query[f"{field}_key"] = {"$regex": f"^{prefix}"}
+        for field in ("event", "banner"):
+            if filters.get(field) is not None:
+                values = list(filters[field])
+                if "" in values:
+                    values.append(None)
+                query[field] = {"$in": values}
+        timestamp = {}
+        if filters.get("since"):
+            timestamp["$gte"] = filters["since"]
+        if filters.get("until"):
+            timestamp["$lt"] = filters["until"]
+        if timestamp:
+            query["timestamp"] = timestamp
+        return query
+
+    def _json_matches(self, filters):
+        """Return sorted cache positions matching ``filters`` (caller holds
+        the lock and has loaded the cache)."""
+        candidates = None
+
+        def narrow(positions):
+            nonlocal candidates
+            positions = set(positions)
+            candidates = positions if candidates is None \
+                else candidates & positions
+
+        if filters.get("event") is not None:
+            narrow(position for event in filters["event"]
+                   for position in self._event_segments.get(event, ()))
+
+        searching = any(filters.get(field) for field in ("name", "email")) \
+            or filters.get("banner") is not None
+        if searching and self._search_index is None:
+            self._build_search_index()
+        index = self._search_index
+
+        for field in ("name", "email"):
+            if filters.get(field):
+                prefix = search_key(filters[field])
+                keys = index[field]
+                lo = bisect.bisect_left(keys, (prefix,))
+                hi = bisect.bisect_left(keys, (prefix + "\uffff",))
+                narrow(position for _, position in keys[lo:hi])
+        if filters.get("banner") is not None:
+            narrow(position for banner in filters["banner"]
+                   for position in index["banner"].get(banner, ()))
+        if candidates is None:
+            candidates = range(len(self._participants_cache))
+
+        since, until = filters.get("since"), filters.get("until")
+        if since or until:
+            candidates = [
+                position for position in candidates
+                if self._in_range(self._participants_cache[position],
+                                  since, until)]
+        return sorted(candidates)
+
+    @staticmethod
+    def _in_range(participant, since, until):
+        """Whether the participant's timestamp is in [since, until)."""
+        timestamp = participant.get("timestamp")
+        if not isinstance(timestamp, str):
+            return False
+        return (not since or timestamp >= since) and \
+            (not until or timestamp < until)
+
+    def _build_search_index(self):
+        """Index the JSON cache by name/email prefix and banner."""
+        index = {"name": [], "email": [], "banner": {}}
+        for position, participant in enumerate(self._participants_cache):
+            for field in ("name", "email"):
+                index[field].append(
+                    (search_key(participant.get(field)), position))
+            index["banner"].setdefault(
+                participant_banner(participant), []).append(position)
+        index["name"].sort()
+        index["email"].sort()
+        self._search_index = index
+
+    def _add_to_search_index(self, start, participants):
+        """Add participants stored from cache position ``start`` onwards."""
+        index = self._search_index
+        for position, participant in enumerate(participants, start):
+            for field in ("name", "email"):
+                bisect.insort(index[field],
+                              (search_key(participant.get(field)), position))
+            index["banner"].setdefault(
+                participant_banner(participant), []).append(position)
+
+    def find_participant(self, participant: dict):
+        """Return the stored participant that ``participant`` duplicates."""
+        key = participant_key(participant)
+        if key is None:
+            return None
         if self.connected and self.db is not None:
-            self.db.participants.insert_one(participant)
+            return self.db.participants.find_one(
+                {"dedup_key": key}, HIDDEN_FIELDS)
+        with self._lock:
+            self._load_json_participants()
+            return self._email_index.get(key)
+
+    def append_participant(self, participant: dict):
+        """Persist one new participant without touching existing records.
+
+        MongoDB gets a single ``insert_one``; the JSON fallback appends one
+        line to the log file and compacts it into the snapshot periodically.
+        Returns ``(record, created)``; when the participant is a duplicate,
+        the existing record is returned and nothing is written.
+        """
+        key = participant_key(participant)
+        if self.connected and self.db is not None:
+            # Without the unique index, duplicates must be looked up first
+            if not self._unique_dedup:
+                existing = self.find_participant(participant)
+                if existing is not None:
+                    return existing, False
+            try:
+                self.db.participants.insert_one(mongo_document(participant))
+            except DuplicateKeyError:
+                return self.find_participant(participant), False
             logger.debug("Saved participant to MongoDB: %s",
                          participant.get("email"))
-            return
+            return participant, True
 
-        # Fallback -> append to JSON file
-        participants = self.get_participants()
-        participants.append(participant)
-        with open(PARTICIPANTS_FILE, "w", encoding="utf-8") as f:
-            json.dump(participants, f, ensure_ascii=False, indent=2)
-        logger.debug("Saved participant to JSON file: %s",
+        with self._lock:
+            self._load_json_participants()
+            if key is not None and key in self._email_index:
+                return self._email_index[key], False
+            with open(PARTICIPANTS_LOG_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(participant, ensure_ascii=False) + "\n")
+            if self._log_entries is None:
+                self._log_entries = len(self._read_log())
+            else:
+                self._log_entries += 1
+            if self._log_entries >= PARTICIPANTS_COMPACT_EVERY:
+                self._compact_log()
+            self._cache_append([participant])
+        logger.debug("Saved participant to JSON log: %s",
                      participant.get("email"))
+        return participant, True
+
+    def submit_participant(self, participant: dict):
+        """Store a new participant, via the write-behind queue if enabled.
+
+        Returns ``(record, status)`` where status is ``"created"``,
+        ``"queued"`` or ``"duplicate"``. Raises WriteQueueFull when the
+        queue has no room left.
+        """
+        if self._write_queue is None:
+            record, created = self.append_participant(participant)
+            return record, "created" if created else "duplicate"
+        existing = self.find_participant(participant)
+        if existing is not None:
+            return existing, "duplicate"
+        try:
+            self._write_queue.put_nowait(dict(participant))
+        except queue.Full:
+            raise WriteQueueFull("Participant write queue is full")
+        return participant, "queued"
+
+    def insert_participants(self, participants):
+        """Persist a batch of new participants.
+
+        MongoDB uses one unordered ``insert_many`` so a bad row does not stop
+        the rest; JSON mode folds the batch into a single atomic snapshot
+        rewrite. Returns a list of ``(index, error)`` for rows that failed,
+        including duplicates of stored or earlier rows.
+        """
+        if not participants:
+            return []
+
+        if self.connected and self.db is not None:
+            docs = [mongo_document(p) for p in participants]
+            errors = []
+            try:
+                self.db.participants.insert_many(docs, ordered=False)
+            except BulkWriteError as exc:
+                for err in exc.details.get("writeErrors", []):
+                    message = DUPLICATE_ERROR if err.get("code") == 11000 \
+                        else err.get("errmsg", "Write failed")
+                    errors.append((err["index"], message))
+            logger.debug("Imported %s participants into MongoDB",
+                         len(participants) - len(errors))
+            return errors
+
+        errors = []
+        with self._lock:
+            current = self._load_json_participants()
+            seen = set()
+            accepted = []
+            for index, participant in enumerate(participants):
+                key = participant_key(participant)
+                if key is not None and (key in self._email_index
+                                        or key in seen):
+                    errors.append((index, DUPLICATE_ERROR))
+                    continue
+                if key is not None:
+                    seen.add(key)
+                accepted.append(dict(participant))
+            if accepted:
+                self._write_snapshot(current + accepted)
+                if os.path.exists(PARTICIPANTS_LOG_FILE):
+                    os.remove(PARTICIPANTS_LOG_FILE)
+                self._log_entries = 0
+                self._cache_append(accepted)
+        logger.debug("Imported %s participants into JSON snapshot",
+                     len(participants) - len(errors))
+        return errors
+
+    def save_participant(self, participant: dict):
+        """Persist a single participant."""
+        return self.append_participant(participant)
+
+    def compact_participants(self):
+        """Fold the JSON append log into the participants snapshot."""
+        if self.connected and self.db is not None:
+            return
+        with self._lock:
+            self._compact_log()
+
+    def _json_state(self):
+        """Return (mtime, size) of the snapshot and log files."""
+        state = []
+        for path in (PARTICIPANTS_FILE, PARTICIPANTS_LOG_FILE):
+            try:
+                stat = os.stat(path)
+                state.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                state.append(None)
+        return tuple(state)
+
+    def _load_json_participants(self):
+        """Return the cached participant list, re-reading it only when the
+        files changed on disk (caller holds the lock)."""
+        state = self._json_state()
+        if self._participants_cache is None or self._cache_key != state:
+            self._participants_cache = self._read_snapshot() + self._read_log()
+            self._cache_key = state
+            self._email_index = {}
+            self._search_index = None
+            self._rollups = {"banner": Counter(), "day": Counter()}
+            self._event_segments = {}
+            self._index_participants(0, self._participants_cache)
+            logger.debug("Fetched %s participants from JSON",
+                         len(self._participants_cache))
+        return self._participants_cache
+
+    def _index_participants(self, start, participants):
+        """Add participants stored from cache position ``start`` onwards to
+        the de-duplication index (first one wins), the per-event segments
+        and the per-banner/per-day rollups."""
+        for position, participant in enumerate(participants, start):
+            self._event_segments.setdefault(
+                participant_event(participant), []).append(position)
+            key = participant_key(participant)
+            if key is not None:
+                self._email_index.setdefault(key, participant)
+            self._rollups["banner"][participant_banner(participant)] += 1
+            day = signup_day(participant)
+            if day is not None:
+                self._rollups["day"][day] += 1
+
+    def _cache_append(self, participants):
+        """Extend the JSON cache after our own write instead of dropping it.
+
+        The caller holds the lock and loaded the cache right before writing,
+        so the cache plus ``participants`` matches the files again.
+        """
+        records = [dict(p) for p in participants]
+        start = len(self._participants_cache)
+        self._participants_cache.extend(records)
+        self._index_participants(start, records)
+        if self._search_index is not None:
+            self._add_to_search_index(start, records)
+        self._cache_key = self._json_state()
+
+    def _write_generation(self, name):
+        """Return the write generation of ``name`` stored in MongoDB."""
+        doc = self.db.meta.find_one({"_id": name})
+        return doc.get("generation", 0) if doc else 0
+
+    def _read_snapshot(self):
+        """Read the participants snapshot file (caller holds the lock)."""
+        if not os.path.exists(PARTICIPANTS_FILE):
+            return []
+        with open(PARTICIPANTS_FILE, "r", encoding="utf-8") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                logger.error(
+                    "Invalid JSON in participants file. Returning empty list.")
+                return []
+
+    def _read_log(self):
+        """Read the append log, skipping torn or invalid lines."""
+        if not os.path.exists(PARTICIPANTS_LOG_FILE):
+            return []
+        entries = []
+        with open(PARTICIPANTS_LOG_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.error("Skipping invalid line in participants log")
+        return entries
+
+    def _write_snapshot(self, participants):
+        """Atomically replace the snapshot file (caller holds the lock)."""
+        write_atomic(PARTICIPANTS_FILE,
+                     json.dumps(participants, ensure_ascii=False, indent=2))
+
+    def _compact_log(self):
+        """Merge log entries into the snapshot, then truncate the log."""
+        entries = self._read_log()
+        if entries:
+            self._write_snapshot(self._read_snapshot() + entries)
+            os.remove(PARTICIPANTS_LOG_FILE)
+            logger.debug("Compacted %s participants into JSON snapshot",
+                         len(entries))
+        self._log_entries = 0
+
+    # Write-behind helpers ----------------------------------------------------------------
+
+    def start_write_behind(self):
+        """Start the background flusher for queued participants."""
+        if self._flusher is not None:
+            return
+        self._write_queue = queue.Queue(maxsize=WRITE_BEHIND_QUEUE_SIZE)
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="participant-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.stop_write_behind)
+        logger.info("Participant write-behind enabled (queue size %s)",
+                    WRITE_BEHIND_QUEUE_SIZE)
+
+    def stop_write_behind(self, timeout=10.0):
+        """Flush everything still queued and stop the flusher."""
+        if self._flusher is None:
+            return
+        self._write_queue.put(_STOP)
+        self._flusher.join(timeout)
+        self._flusher = None
+        self._write_queue = None
+
+    def _flush_loop(self):
+        """Collect queued participants into batches and write them."""
+        stopping = False
+        while not stopping:
+            item = self._write_queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + WRITE_BEHIND_FLUSH_SECONDS
+            while len(batch) < WRITE_BEHIND_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._write_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush_batch(batch)
+
+    def _flush_batch(self, batch):
+        """Write one batch of queued participants, logging any failures."""
+        try:
+            errors = self.insert_participants(batch)
+        except Exception as exc:
+            logger.error("Failed to write %s queued participants: %s",
+                         len(batch), exc)
+            return
+        for index, error in errors:
+            log = logger.debug if error == DUPLICATE_ERROR else logger.error
+            log("Failed to write queued participant %s: %s",
+                batch[index].get("email"), error)
+        logger.debug("Flushed %s queued participants", len(batch))
 
     # GridFS helpers ---------------------------------------------------------------------
 
-    def store_file(self, file_obj, filename: str):
-        """Store a file in GridFS. Returns the file_id or None if fallback."""
+    def find_file_by_hash(self, sha256: str):
+        """Return the id of the GridFS file with this SHA-256, or None."""
+        if not self.connected or self.fs is None:
+            return None
+        doc = self.db.fs.files.find_one(
+            {"metadata.sha256": sha256}, {"_id": True})
+        return str(doc["_id"]) if doc else None
+
+    def store_file(self, file_obj, filename: str, content_type: str = None,
+                   sha256: str = None):
+        """Store a file in GridFS. Returns the file_id or None if fallback.
+
+        Content is addressed by its SHA-256 (computed here for bytes): when a
+        file with the same hash exists, its id is returned and nothing is
+        written.
+        """
         if self.connected and self.fs is not None:
-            file_id = self.fs.put(file_obj, filename=filename)
+            if sha256 is None and isinstance(file_obj, bytes):
+                sha256 = hashlib.sha256(file_obj).hexdigest()
+            if sha256 is not None:
+                existing = self.find_file_by_hash(sha256)
+                if existing is not None:
+                    logger.debug("File %s already stored as %s",
+                                 filename, existing)
+                    return existing
+            metadata = {}
+            if content_type:
+                metadata["contentType"] = content_type
+            if sha256:
+                metadata["sha256"] = sha256
+            file_id = self.fs.put(file_obj, filename=filename,
+                                  metadata=metadata or None)
+            self._bump_files_generation()
             logger.debug("Stored file %s in GridFS with id %s",
                          filename, str(file_id))
             return str(file_id)
@@ -100,12 +825,109 @@ class DatabaseManager:
             "store_file called but MongoDB/FS not available. No-op.")
         return None
 
+    def store_variant(self, file_id, width: int, data: bytes, filename: str):
+        """Store a resized WebP variant of a GridFS file."""
+        variant_id = self.fs.put(data, filename=filename, metadata={
+            "variant_of": ObjectId(file_id),
+            "width": width,
+            "contentType": "image/webp",
+        })
+        return str(variant_id)
+
+    def find_variant(self, file_id, width: int):
+        """Return the id of the narrowest variant at least ``width`` wide."""
+        doc = self.db.fs.files.find_one(
+            {"metadata.variant_of": ObjectId(file_id),
+             "metadata.width": {"$gte": width}},
+            {"_id": True}, sort=[("metadata.width", 1)])
+        return str(doc["_id"]) if doc else None
+
+    def has_variants(self, file_id):
+        """Whether variants were already generated for a GridFS file."""
+        return self.db.fs.files.find_one(
+            {"metadata.variant_of": ObjectId(file_id)}, {"_id": True}) \
+            is not None
+
+    def delete_file(self, file_id):
+        """Delete a GridFS file together with its variants.
+
+        Returns the ids (as strings) of everything deleted.
+        """
+        file_id = ObjectId(file_id)
+        deleted = []
+        for doc in self.db.fs.files.find(
+                {"metadata.variant_of": file_id}, {"_id": True}):
+            self.fs.delete(doc["_id"])
+            deleted.append(str(doc["_id"]))
+        self.fs.delete(file_id)
+        deleted.append(str(file_id))
+        self._bump_files_generation()
+        return deleted
+
+    def list_files(self):
+        """Return metadata of the stored originals (not variants), oldest first.
+
+        Reads only the fs.files fields in FILE_LISTING_FIELDS. The result is
+        cached until a file is stored or deleted by any worker, which is
+        tracked through a write generation in the ``meta`` collection.
+        Callers must not modify the returned list.
+        """
+        generation = self._write_generation("files")
+        with self._lock:
+            if self._files_cache is not None \
+                    and self._files_cache_key == generation:
+                return self._files_cache
+        files = []
+        for doc in self.db.fs.files.find(
+                {"metadata.variant_of": {"$exists": False}},
+                FILE_LISTING_FIELDS).sort("_id", 1):
+            files.append({
+                "id": str(doc["_id"]),
+                "filename": doc.get("filename"),
+                "length": doc.get("length", 0),
+                "uploadDate": doc.get("uploadDate"),
+                "contentType": (doc.get("metadata") or {}).get("contentType"),
+            })
+        with self._lock:
+            self._files_cache = files
+            self._files_cache_key = generation
+        return files
+
+    def _bump_files_generation(self):
+        """Invalidate the file listing of every worker."""
+        self.db.meta.update_one(
+            {"_id": "files"}, {"$inc": {"generation": 1}}, upsert=True)
+        with self._lock:
+            self._files_cache = None
+
+    def open_file(self, file_id):
+        """Return a GridOut for file_id without reading its contents.
+
+        Raises gridfs.errors.NoFile (or bson InvalidId) when it does not exist.
+        """
+        if not self.connected or self.fs is None:
+            raise RuntimeError("GridFS not available")
+        return self.fs.get(ObjectId(file_id))
+
     def retrieve_file(self, file_id, destination: str):
-        """Retrieve a file from GridFS and write it to destination path."""
+        """Retrieve a file from GridFS and write it to destination path.
+
+        file_id may also be a GridOut that was already opened. The file is
+        copied chunk by chunk rather than read into memory at once.
+        """
         if self.connected and self.fs is not None:
-            grid_out = self.fs.get(file_id)
+            if isinstance(file_id, GridOut):
+                grid_out = file_id
+                file_id = grid_out._id
+            else:
+                grid_out = self.fs.get(ObjectId(file_id))
+            grid_out.seek(0)
             with open(destination, "wb") as f:
-                f.write(grid_out.read())
+                while True:
+                    chunk = grid_out.read(grid_out.chunk_size)
+                    if not chunk:
+                        break
+                    f.write(chunk)
             logger.debug("Retrieved file id %s to %s",
                          str(file_id), destination)
             return destination
@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+# Process umask, for giving replaced files the mode a plain open() would
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def file_mode(path: str) -> int:
+    """Permission bits for a file about to replace ``path``.
+
+    The existing file's mode if there is one, else what the umask gives.
+    """
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def replace_file(tmp_path: str, path: str):
+    """Move a finished temp file over ``path``.
+
+    mkstemp creates files as 0600, so the temp file first gets the mode of
+    the file it replaces.
+    """
+    os.chmod(tmp_path, file_mode(path))
+    os.replace(tmp_path, path)
+
+
+def write_atomic(path: str, data):
+    """Write bytes, or text as UTF-8, next to ``path`` and move it into place"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        replace_file(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,167 @@
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from config import GRIDFS_CACHE_DIR, GRIDFS_CACHE_MAX_BYTES
+from database import db_manager
+
+logger = logging.getLogger(__name__)
+
+
+class FileCache:
+    """Least-recently-used disk cache of GridFS files, keyed by ObjectId.
+
+    Cached files are named ``<file_id><ext>`` (the extension follows the
+    content type) and carry the upload date as their mtime, so a hit can be
+    served from disk without asking MongoDB anything. The LRU order is kept
+    per process; the directory is rescanned on startup.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None  # file_id -> (path, size), oldest first
+        self._size = 0
+        self._pending = set()  # file_ids being copied in the background
+        self._discarded = set()  # pending file_ids deleted meanwhile
+        self._executor = None
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get(self, file_id: str):
+        """Return the cached path for file_id, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(file_id)
+            if entry is None:
+                return None
+            if not os.path.exists(entry[0]):
+                # Evicted by another worker sharing the directory
+                self._drop(file_id)
+                return None
+            entries.move_to_end(file_id)
+            return entry[0]
+
+    def fill_async(self, file_id: str, length: int):
+        """Copy a GridFS file into the cache on a background thread.
+
+        The request that missed keeps streaming from GridFS; later requests
+        find the file on disk. Files larger than the whole budget, and files
+        already being copied, are skipped.
+        """
+        if not self.enabled or length > self.max_bytes:
+            return
+        with self._lock:
+            if file_id in self._pending:
+                return
+            self._pending.add(file_id)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="gridfs-cache")
+        self._executor.submit(self._fill, file_id)
+
+    def _fill(self, file_id: str):
+        try:
+            self.put(file_id, db_manager.open_file(file_id))
+        except Exception as e:
+            logger.warning("Could not cache GridFS file %s: %s", file_id, e)
+        finally:
+            with self._lock:
+                self._pending.discard(file_id)
+                self._discarded.discard(file_id)
+
+    def put(self, file_id: str, grid_out):
+        """Copy an opened GridFS file into the cache and return its path.
+
+        Returns None when the cache is disabled, the file alone exceeds the
+        byte budget, or it was discarded while being copied.
+        """
+        if not self.enabled or grid_out.length > self.max_bytes:
+            return None
+        content_type = (grid_out.metadata or {}).get("contentType") \
+            or mimetypes.guess_type(grid_out.filename or "")[0]
+        extension = mimetypes.guess_extension(content_type or "") or ""
+        path = os.path.join(self.directory, f"{file_id}{extension}")
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            db_manager.retrieve_file(grid_out, tmp_path)
+            uploaded = grid_out.upload_date.timestamp()
+            os.utime(tmp_path, (uploaded, uploaded))
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if file_id in self._discarded:
+                # Deleted while we were copying it
+                os.remove(path)
+                return None
+            entries = self._load()
+            if file_id in entries:
+                self._drop(file_id, remove=False)
+            entries[file_id] = (path, grid_out.length)
+            self._size += grid_out.length
+            while self._size > self.max_bytes and len(entries) > 1:
+                self._drop(next(iter(entries)))
+        return path
+
+    def discard(self, file_id: str):
+        """Remove file_id from the cache, e.g. after it was deleted."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if file_id in self._pending:
+                self._discarded.add(file_id)
+            entries = self._load()
+            if file_id in entries:
+                self._drop(file_id)
+
+    def _load(self):
+        """Index the cache directory on first use (caller holds the lock)."""
+        if self._entries is not None:
+            return self._entries
+        self._entries = OrderedDict()
+        self._size = 0
+        if os.path.isdir(self.directory):
+            found = []
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".tmp") or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    found.append((stat.st_atime, entry.name, stat.st_size))
+            for _, name, size in sorted(found):
+                self._entries[os.path.splitext(name)[0]] = (
+                    os.path.join(self.directory, name), size)
+                self._size += size
+        return self._entries
+
+    def _drop(self, file_id: str, remove: bool = True):
+        """Forget an entry and delete its file (caller holds the lock)."""
+        path, size = self._entries.pop(file_id)
+        self._size -= size
+        if remove:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Could not evict cached file %s: %s", path, e)
+
+
+# Shared instance used by the API
+file_cache = FileCache(GRIDFS_CACHE_DIR, GRIDFS_CACHE_MAX_BYTES)
@@ -515,8 +515,17 @@ async function fetchAndShowParticipants(eventNumber) {
         return;
     }
 
+    // Only request this event's participants; entries without an event
+    // belong to event 1 (see displayParticipants)
+    const params = new URLSearchParams();
+    params.append('event', String(eventNumber));
+    if (String(eventNumber) === '1') {
+        params.append('event', '');
+    }
+    const participantsUrl = `${API_BASE_URL}/participants?${params}`;
+
     try {
-        const res = await fetch(`${API_BASE_URL}/participants`, {
+        const res = await fetch(participantsUrl, {
             headers: {
                 'Authorization': `Bearer ${accessToken}`
             }
@@ -540,7 +549,7 @@ async function fetchAndShowParticipants(eventNumber) {
                     localStorage.setItem('refreshToken', refreshData.refresh_token);
 
                     // Retry the original request
-                    const retryRes = await fetch(`${API_BASE_URL}/participants`, {
+                    const retryRes = await fetch(participantsUrl, {
                         headers: {
                             'Authorization': `Bearer ${refreshData.access_token}`
                         }
@@ -578,8 +587,10 @@ function displayParticipants(data, eventNumber, listDiv) {
         return;
     }
 
-    // Filter by banner/section
-    const filtered = data.participants.filter(p => (p.banner || '1') === String(eventNumber));
+    // Filter by event; older entries only carry their banner, and entries
+    // with neither belong to event 1
+    const filtered = data.participants.filter(
+        p => String((p.event ?? p.banner) || '1') === String(eventNumber));
     if (filtered.length === 0) {
         listDiv.innerHTML = '<p>Keine Teilnehmer für dieses Event.</p>';
     } else {
@@ -1,6 +1,71 @@
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from collections import OrderedDict
+import email.utils
+import io
 import os
 import sys
+import threading
+
+# Files up to this size are kept in memory, within a total byte budget
+CACHE_MAX_FILE_BYTES = 256 * 1024
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Precompressed siblings served when the client accepts them, best first
+PRECOMPRESSED = [('br', '.br'), ('gzip', '.gz')]
+
+
+class AssetCache:
+    """Thread-safe LRU of small file contents, validated by mtime and size."""
+
+    def __init__(self, max_file_bytes, max_bytes):
+        self.max_file_bytes = max_file_bytes
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # path -> (mtime_ns, size, data)
+        self._size = 0
+
+    def read(self, path, stat):
+        """Return the contents of path, or None if it is too large to cache."""
+        if stat.st_size > self.max_file_bytes:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(path)
+                return entry[2]
+        with open(path, 'rb') as f:
+            data = f.read()
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old:
+                self._size -= len(old[2])
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, data)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return data
+
+
+asset_cache = AssetCache(CACHE_MAX_FILE_BYTES, CACHE_MAX_BYTES)
+
+
+def accepted_encodings(header):
+    """Encodings an Accept-Encoding header allows, i.e. with q > 0."""
+    accepted = set()
+    for part in header.split(','):
+        name, *params = [item.strip() for item in part.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.lower())
+    return accepted
 
 
 class CustomHandler(SimpleHTTPRequestHandler):
@@ -16,11 +81,84 @@ class CustomHandler(SimpleHTTPRequestHandler):
             return 'text/css'
         return super().guess_type(path)
 
+    def send_head(self):
+        """Serve files with ETags, precompressed siblings and caching.
+
+        Directories and missing files are left to SimpleHTTPRequestHandler.
+        """
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split('?', 1)[0].endswith('/'):
+                return super().send_head()
+            for index in ('index.html', 'index.htm'):
+                if os.path.isfile(os.path.join(path, index)):
+                    path = os.path.join(path, index)
+                    break
+            else:
+                return super().send_head()
+        if not os.path.isfile(path):
+            return super().send_head()
+
+        ctype = self.guess_type(path)
+        encoding, path = self.select_encoding(path)
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+        last_modified = self.date_time_string(int(stat.st_mtime))
+
+        if self.is_not_modified(etag, stat.st_mtime):
+            self.send_response(304)
+            self.send_validators(etag, last_modified)
+            self.end_headers()
+            return None
+
+        data = asset_cache.read(path, stat)
+        body = io.BytesIO(data) if data is not None else open(path, 'rb')
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(stat.st_size))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_validators(etag, last_modified)
+        self.end_headers()
+        return body
+
+    def select_encoding(self, path):
+        """Pick an up-to-date precompressed sibling the client accepts."""
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding', ''))
+        mtime = os.stat(path).st_mtime_ns
+        for encoding, suffix in PRECOMPRESSED:
+            sibling = path + suffix
+            if encoding in accepted and os.path.isfile(sibling) \
+                    and os.stat(sibling).st_mtime_ns >= mtime:
+                return encoding, sibling
+        return None, path
+
+    def is_not_modified(self, etag, mtime):
+        """Evaluate If-None-Match, falling back to If-Modified-Since."""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since.timestamp()
+        return False
+
+    def send_validators(self, etag, last_modified):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+
 
 def run_server(port):
     try:
         server_address = ('', port)
-        httpd = HTTPServer(server_address, CustomHandler)
+        httpd = ThreadingHTTPServer(server_address, CustomHandler)
         print(f"Server running on http://localhost:{port}")
         httpd.serve_forever()
     except PermissionError:
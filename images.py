@@ -0,0 +1,95 @@
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; banners are then served as uploaded
+    Image = None
+
+from config import (
+    IMAGE_VARIANT_WIDTHS, IMAGE_VARIANT_QUALITY, IMAGE_VARIANT_WORKERS
+)
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def variants_available():
+    """Whether resized variants can be generated in this environment."""
+    return Image is not None and bool(IMAGE_VARIANT_WIDTHS)
+
+
+def variant_name(filename: str, width: int) -> str:
+    """Name of the WebP variant of an uploaded file at the given width."""
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}.w{width}.webp"
+
+
+def render_variants(source_path: str, widths=None):
+    """Return ``[(width, webp_bytes), ...]`` for each width below the image's.
+
+    Runs in a worker process, so it only takes and returns plain data.
+    Images are never upscaled; the original covers larger requests.
+    """
+    widths = sorted(widths or IMAGE_VARIANT_WIDTHS)
+    with Image.open(source_path) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        variants = []
+        for width in widths:
+            if width >= image.width:
+                break
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, "WEBP", quality=IMAGE_VARIANT_QUALITY)
+            variants.append((width, buffer.getvalue()))
+    return variants
+
+
+def submit_variants(source_path: str, on_done):
+    """Render variants of the image file in the process pool and call
+    ``on_done(variants)``.
+
+    Returns the future immediately, or None when variants are unavailable
+    or the job could not be started. Never raises: failures are logged and
+    otherwise ignored since the original upload is always available.
+    """
+    global _executor
+    if not variants_available():
+        return None
+
+    def callback(future):
+        try:
+            on_done(future.result())
+        except Exception as e:
+            logger.error("Error generating image variants: %s", e)
+
+    for attempt in range(2):
+        if _executor is None:
+            # Spawned workers do not inherit the server's sockets or threads
+            _executor = ProcessPoolExecutor(
+                max_workers=IMAGE_VARIANT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"))
+        try:
+            future = _executor.submit(render_variants, source_path)
+        except BrokenProcessPool as e:
+            # A crashed worker breaks the pool for good; start a fresh one
+            logger.warning("Image variant pool broken, restarting: %s", e)
+            _executor.shutdown(wait=False)
+            _executor = None
+            continue
+        except Exception as e:
+            logger.error("Could not schedule image variants: %s", e)
+            return None
+        future.add_done_callback(callback)
+        return future
+    logger.error("Could not schedule image variants: pool keeps breaking")
+    return None
+
@@ -0,0 +1,118 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+
+from flask import has_request_context, request
+
+from config import LOG_LEVEL, LOG_FORMAT, LOG_LEVELS, LOG_SAMPLE_RATES
+
+_listener = None
+
+
+def parse_pairs(value: str) -> dict:
+    """Parse ``"a=1,b=2"`` into ``{"a": "1", "b": "2"}``."""
+    pairs = {}
+    for item in value.split(','):
+        if '=' in item:
+            key, val = item.split('=', 1)
+            pairs[key.strip()] = val.strip()
+    return pairs
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request to records and sample busy endpoints.
+
+    Runs on the logging thread of the caller, so it only copies a few
+    attributes; dropped records never reach the queue.
+    """
+
+    def __init__(self, sample_rates: dict):
+        super().__init__()
+        self.sample_rates = sample_rates
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        record.endpoint = request.endpoint
+        record.method = request.method
+        record.path = request.path
+        rate = self.sample_rates.get(request.endpoint)
+        if rate is not None and record.levelno < logging.WARNING:
+            return random.random() < rate
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread.
+
+    The stock prepare() interpolates the message and formats tracebacks on
+    the calling thread. Our queue never leaves the process, so the record
+    can be passed on untouched.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    FIELDS = ('endpoint', 'method', 'path')
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created))
+            + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure_logging():
+    """Route all logging through a queue to a background writer thread.
+
+    The request thread only filters and enqueues records; interpolation,
+    traceback formatting and writing to stderr all happen in the
+    QueueListener. Safe to call twice.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    if LOG_FORMAT == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    sample_rates = {endpoint: float(rate) for endpoint, rate
+                    in parse_pairs(LOG_SAMPLE_RATES).items()}
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter(sample_rates))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    for name, level in parse_pairs(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -57,6 +57,44 @@ def test_file_download(file_url):
     return response.status_code == 200
 
 
+def test_batch_upload(token):
+    print("\nTesting Batch Upload...")
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    files = [
+        ("files", ("batch_a.png", b"fake png data a", "image/png")),
+        ("files", ("batch_b.gif", b"fake gif data b", "image/gif")),
+        ("files", ("batch_c.bmp", b"not allowed", "image/bmp")),
+    ]
+    response = requests.post(
+        f"{BASE_URL}/banners/batch", files=files, headers=headers)
+    print(f"Batch Upload Status: {response.status_code}")
+    if response.status_code != 201:
+        print(f"Batch upload failed: {response.text}")
+        return False
+    results = response.json()["results"]
+    print(f"Results: {results}")
+    return (len(results) == 3
+            and all("url" in r for r in results[:2])
+            and "error" in results[2])
+
+
+def test_participant_stats(token):
+    print("\nTesting Participant Stats...")
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    # The same banner sent as a string and as a number
+    for banner in ("2", 2):
+        data = {"name": "Stats User", "message": "Stats", "banner": banner}
+        requests.post(f"{BASE_URL}/participants", json=data)
+    response = requests.get(f"{BASE_URL}/participants/stats", headers=headers)
+    print(f"Stats Status: {response.status_code}")
+    if response.status_code != 200:
+        print(f"Stats failed: {response.text}")
+        return False
+    stats = response.json()
+    print(f"Stats: {stats}")
+    return stats["by_banner"].get("2", 0) >= 2
+
+
 def test_delete_invalid_file(token):
     print("\nTesting DELETE with invalid file type...")
     headers = {"Authorization": f"Bearer {token}"} if token else {}
@@ -81,6 +119,24 @@ def test_participants():
     return response.status_code in [200, 401]  # 401 is expected without auth
 
 
+def test_participants_pagination(token):
+    print("\nTesting Participants Pagination...")
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    response = requests.get(
+        f"{BASE_URL}/participants?limit=1", headers=headers)
+    print(f"First page status: {response.status_code}")
+    if response.status_code != 200:
+        return False
+    page = response.json()
+    if len(page["participants"]) > 1 or "next_after" not in page:
+        return False
+
+    response = requests.get(
+        f"{BASE_URL}/participants?stream=1", headers=headers)
+    print(f"Stream status: {response.status_code}")
+    return response.status_code == 200 and "participants" in response.json()
+
+
 if __name__ == "__main__":
     print("Starting API Tests...")
 
@@ -107,16 +163,34 @@ if __name__ == "__main__":
     else:
         print("❌ File upload failed")
 
-    # Test 4: DELETE with invalid file type
+    # Test 4: Batch upload
+    if test_batch_upload(token):
+        print("✅ Batch upload passed")
+    else:
+        print("❌ Batch upload failed")
+
+    # Test 5: DELETE with invalid file type
     if test_delete_invalid_file(token):
         print("✅ DELETE error message test passed")
     else:
         print("❌ DELETE error message test failed")
 
-    # Test 5: Participants
+    # Test 6: Participants
     if test_participants():
         print("✅ Participants test passed")
     else:
         print("❌ Participants test failed")
 
+    # Test 7: Participants pagination and streaming
+    if test_participants_pagination(token):
+        print("✅ Participants pagination test passed")
+    else:
+        print("❌ Participants pagination test failed")
+
+    # Test 8: Participant stats
+    if test_participant_stats(token):
+        print("✅ Participant stats passed")
+    else:
+        print("❌ Participant stats failed")
+
     print("\n🎉 All tests completed!")
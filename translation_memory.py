@@ -0,0 +1,119 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, Optional
+
+# Unflushed lookup counters are written out at least this often
+COUNTER_FLUSH_SECONDS = 60
+
+
+class TranslationMemory:
+    """Persistent translation memory backed by SQLite.
+
+    Entries are keyed by the SHA-256 of (source language, target language,
+    text), so keys are stable across processes and restarts. Every call
+    opens its own connection; WAL mode and a busy timeout let several
+    gunicorn workers read and write the same file safely. Lookups stay
+    read-only: hit and miss counts are kept in memory and written with the
+    next put, or after COUNTER_FLUSH_SECONDS.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = {'hits': 0, 'misses': 0}
+        self._flushed_at = time.monotonic()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " key TEXT PRIMARY KEY,"
+                " source_language TEXT NOT NULL,"
+                " target_language TEXT NOT NULL,"
+                " translation TEXT NOT NULL,"
+                " created_at TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                " name TEXT PRIMARY KEY,"
+                " value INTEGER NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def key(source_language: str, target_language: str, text: str) -> str:
+        """Stable key of a text in a language pair"""
+        payload = "\0".join([source_language, target_language, text])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, source_language: str, target_language: str, text: str) -> Optional[str]:
+        """Return the stored translation, counting the lookup as hit or miss"""
+        key = self.key(source_language, target_language, text)
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT translation FROM translations WHERE key = ?",
+                (key,)).fetchone()
+        with self._lock:
+            self._pending['hits' if row else 'misses'] += 1
+            due = time.monotonic() - self._flushed_at >= COUNTER_FLUSH_SECONDS
+        if due:
+            self.flush_counters()
+        return row[0] if row else None
+
+    def put(self, source_language: str, target_language: str, text: str,
+            translation: str):
+        """Store a translation; the write is a single atomic transaction"""
+        key = self.key(source_language, target_language, text)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                (key, source_language, target_language, translation,
+                 datetime.now().isoformat()))
+            self._write_counters(conn)
+
+    def flush_counters(self):
+        """Write the in-memory lookup counters to the database"""
+        with closing(self._connect()) as conn, conn:
+            self._write_counters(conn)
+
+    def _write_counters(self, conn):
+        with self._lock:
+            pending = self._pending
+            self._pending = {'hits': 0, 'misses': 0}
+            self._flushed_at = time.monotonic()
+        try:
+            for name, value in pending.items():
+                if value:
+                    conn.execute(
+                        "INSERT INTO counters (name, value) VALUES (?, ?)"
+                        " ON CONFLICT(name) DO UPDATE SET value = value + ?",
+                        (name, value, value))
+        except sqlite3.Error:
+            # Keep the counts for the next attempt
+            with self._lock:
+                for name, value in pending.items():
+                    self._pending[name] += value
+            raise
+
+    def stats(self) -> Dict:
+        """Lookup counters across all workers, i.e. API calls saved
+
+        Flushed counts of every worker plus this worker's unflushed ones.
+        """
+        with closing(self._connect()) as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters"))
+            entries = conn.execute(
+                "SELECT COUNT(*) FROM translations").fetchone()[0]
+        with self._lock:
+            hits = counters.get('hits', 0) + self._pending['hits']
+            misses = counters.get('misses', 0) + self._pending['misses']
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'entries': entries,
+        }